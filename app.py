@@ -1,14 +1,10 @@
-import os
-import sqlite3
 import streamlit as st
 import pandas as pd
 from streamlit_option_menu import option_menu
-from load_data import download_and_load_parquet
-from preprocess_top_skills import create_top_skills_summary
-from preprocess_salary import create_salary_summary
-from preprocess_demand_skills import create_demand_skill_summary
-from preprocess_location import create_job_country_summary
-from preprocess_introduction import create_all_intro_summaries
+from build_db import DB_PATH, artifact_ready, build
+from config import REQUIRE_PREBUILT_DB
+from tracing import render_sidebar, serve_metrics, write_metrics
+from warmup import start_warmup
 from pages import introduction, salary, top_skills,location
 
 
@@ -28,56 +24,23 @@ div[data-testid="stSelectbox"] > div {
 
 
 
-DB_PATH = 'jobs_skills.db'
-
-def setup_sqlite_db_from_csv(dataframes):
-    conn = sqlite3.connect(DB_PATH)
-    dataframes['job_postings_fact.parquet'].to_sql('job_postings_fact', conn, if_exists='replace', index=False)
-    dataframes['skills_dim.parquet'].to_sql('skills_dim', conn, if_exists='replace', index=False)
-    dataframes['skills_job_dim.parquet'].to_sql('skills_job_dim', conn, if_exists='replace', index=False)
-    conn.commit()
-    conn.close()
-
-def db_has_required_tables():
-    if not os.path.exists(DB_PATH):
-        print(f"Database file not found at {DB_PATH}")
-        return False
-
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = {row[0] for row in cursor.fetchall()}
-        conn.close()
-
-        required_tables = {
-            "top_10_skills_summary",
-            "skill_type_distribution_summary",
-            "job_country_summary",
-            "top_job_titles_summary"
-        }
-
-        return required_tables.issubset(tables)
-    except Exception as e:
-        print(f"Error checking DB tables: {e}")
-        return False
-
+# ETL dijalankan di luar Streamlit: `python build_db.py`. App cukup membuka
+# artifact jadi. Tanpa JOBS_REQUIRE_PREBUILT_DB, app masih bisa build sendiri
+# sebagai fallback (mis. di Streamlit Cloud yang tidak punya langkah build).
+@st.cache_resource(show_spinner=False)
 def ensure_db_and_summary():
-    if not db_has_required_tables():
-        dataframes = download_data_cached()
-        setup_sqlite_db_from_csv(dataframes)
-        create_salary_summary()
-        create_top_skills_summary()
-        create_demand_skill_summary()
-        create_all_intro_summaries()
-        create_job_country_summary()
-
-# Cache loading
-@st.cache_data
-def download_data_cached():
-    return download_and_load_parquet()
+    if artifact_ready(DB_PATH):
+        return
+    if REQUIRE_PREBUILT_DB:
+        st.error(f"{DB_PATH} belum dibuild. Jalankan `python build_db.py` sebelum deploy.")
+        st.stop()
+    with st.spinner("Building database..."):
+        build(DB_PATH)
 
 ensure_db_and_summary()
+serve_metrics()
+# Opt-in (JOBS_WARMUP=1): isi cache view default dan filter umum di background
+start_warmup()
 
 # Sidebar
 with st.sidebar:
@@ -114,4 +77,7 @@ elif selected == "🛠️ Top Skills":
 # 📍 Location
 elif selected == "📍 Location":
     location.location_render()
-    
+
+# Setelah page dirender, supaya span rerun ini ikut tampil / tertulis
+render_sidebar()
+write_metrics()
@@ -0,0 +1,298 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from bitmap_index import bitmap_index
+from build_db import SUMMARY_REGISTRY, build_order, ingest_sources, serving_tables
+from columnar import ENGINES, export_tables, publish_export
+from config import QUERY_ENGINE
+from db import DB_PATH, close_all
+from indexes import BASE_INDEXES, SUMMARY_INDEXES, create_indexes
+from load_data import files
+from synthetic_data import generate
+from preprocess_demand_skills import load_demand_skills
+from preprocess_introduction import (
+    load_job_country, load_job_summary_stats, load_skill_type_distribution, load_top_job_title_summary,
+)
+from preprocess_location import GRID_LEVELS, load_job_country_summary, load_job_location_grid
+from preprocess_salary import load_salary_histogram, load_salary_quantiles, load_salary_summary
+from preprocess_top_skills import load_top_skills_summary
+
+# Benchmark semua create_* dan load_* di atas data sintetis (synthetic_data.py)
+# untuk beberapa skala. Hasilnya JSON, bisa dibandingkan dengan hasil lama
+# lewat --baseline untuk menangkap regresi.
+RESULTS_PATH = 'benchmark.json'
+WORK_DIR = 'bench_data'
+DEFAULT_SCALES = '10k,100k,1m'
+LOAD_REPEAT = 3
+RSS_SAMPLE_SECONDS = 0.005
+REGRESSION_TOLERANCE = 0.25
+# Perubahan di bawah ini dianggap noise, bukan regresi
+REGRESSION_MIN_SECONDS = 0.005
+
+TITLES = [None, 'Data Analyst', ['Data Analyst', 'Data Engineer']]
+SKILL_TYPES = [None, 'programming']
+SCHEDULES = [None, 'Full-time']
+# (distinct_counts, backend) untuk load_top_skills_summary
+TOP_SKILLS_MODES = [('sketch', 'sql'), ('exact', 'sql'), ('exact', 'bitmap'), ('exact', 'materialized')]
+
+
+def parse_scale(label):
+    label = label.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(label[-1], 1)
+    return int(float(label.rstrip('km')) * multiplier)
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+# Peak RSS selama blok berjalan (sampling di thread terpisah). Ikut menghitung
+# memori SQLite / DuckDB / numpy, yang tidak kelihatan oleh tracemalloc.
+@contextmanager
+def rss_peak():
+    start = _rss_bytes()
+    sample = {'start': start, 'peak': start}
+    done = threading.Event()
+
+    def sampler():
+        while not done.wait(RSS_SAMPLE_SECONDS):
+            rss = _rss_bytes()
+            if rss is not None and rss > sample['peak']:
+                sample['peak'] = rss
+
+    thread = threading.Thread(target=sampler, daemon=True)
+    if start is not None:
+        thread.start()
+    try:
+        yield sample
+    finally:
+        done.set()
+        if start is not None:
+            thread.join()
+            sample['peak'] = max(sample['peak'], _rss_bytes() or 0)
+
+
+# Waktu = run tercepat dari `repeat`. Memori: peak RSS selama run (termasuk
+# memori native, tapi tidak naik kalau halaman bekas run sebelumnya dipakai
+# ulang) dan, kalau trace, peak alokasi Python/numpy dari satu run tambahan
+# dengan tracemalloc (tracemalloc memperlambat, jadi tidak ikut diukur waktunya).
+def measure(func, *args, repeat=1, trace=True, **kwargs):
+    seconds = []
+    peak = None
+    result = None
+    for _ in range(repeat):
+        with rss_peak() as rss:
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            seconds.append(time.perf_counter() - started)
+        if rss['start'] is not None:
+            peak = max(peak or 0, rss['peak'] - rss['start'])
+    alloc_peak = None
+    if trace:
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            alloc_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, {
+        'seconds': round(min(seconds), 6),
+        'seconds_all': [round(s, 6) for s in seconds],
+        'peak_rss_mib': round(peak / 2 ** 20, 2) if peak is not None else None,
+        'peak_alloc_mib': round(alloc_peak / 2 ** 20, 2) if alloc_peak is not None else None,
+        'rows': len(result) if isinstance(result, pd.DataFrame) else None,
+    }
+
+
+def uncached(load):
+    # Panggil fungsi asli, bukan hasil st.cache_data / cache disk
+    return inspect.unwrap(load)
+
+
+def load_cases():
+    cases = [
+        ('load_top_job_title_summary', load_top_job_title_summary, {}),
+        ('load_skill_type_distribution', load_skill_type_distribution, {}),
+        ('load_job_country', load_job_country, {}),
+        ('load_job_summary_stats', load_job_summary_stats, {}),
+        ('load_job_country_summary', load_job_country_summary, {}),
+        *(('load_job_location_grid', load_job_location_grid, {'zoom': zoom}) for zoom in GRID_LEVELS),
+        ('load_salary_summary', load_salary_summary, {'month': None, 'backend': 'sql'}),
+        ('load_salary_summary', load_salary_summary, {'month': 1, 'backend': 'sql'}),
+        ('load_salary_summary', load_salary_summary, {'month': 1, 'backend': 'materialized'}),
+        ('load_salary_histogram', load_salary_histogram, {'month': None, 'backend': 'sql'}),
+        ('load_salary_histogram', load_salary_histogram, {'month': None, 'backend': 'materialized'}),
+        ('load_salary_quantiles', load_salary_quantiles, {'month': None, 'backend': 'sql'}),
+        ('load_salary_quantiles', load_salary_quantiles, {'month': 1, 'backend': 'materialized'}),
+        ('load_salary_quantiles', load_salary_quantiles,
+         {'month': None, 'job_title_short': ['Data Analyst', 'Data Scientist'], 'by_title': False, 'backend': 'sql'}),
+    ]
+    for title in TITLES:
+        for skill_type in SKILL_TYPES:
+            for distinct_counts, backend in TOP_SKILLS_MODES:
+                cases.append(('load_top_skills_summary', load_top_skills_summary, {
+                    'job_title_short': title, 'skill_type': skill_type,
+                    'distinct_counts': distinct_counts, 'backend': backend,
+                }))
+        for schedule in SCHEDULES:
+            # Multi-select selalu lewat bitmap, jadi backend lain dilewati
+            for backend in (['bitmap'] if isinstance(title, list) else ['sql', 'bitmap', 'materialized']):
+                cases.append(('load_demand_skills', load_demand_skills, {
+                    'job_title_short': title, 'job_schedule_type': schedule, 'backend': backend,
+                }))
+    return cases
+
+
+def bench_scale(label, n_postings, work_dir, engines, repeat, batch_size=None, trace=True):
+    results = []
+
+    def record(phase, name, stats, **params):
+        results.append({'scale': label, 'postings': n_postings, 'phase': phase,
+                        'name': name, 'params': params, **stats})
+        print(f"[bench] {label} {phase} {name} {params or ''}: {stats['seconds']:.4f}s, "
+              f"peak rss +{stats['peak_rss_mib']} MiB, alloc {stats['peak_alloc_mib']} MiB")
+
+    directory = os.path.join(work_dir, label)
+    if not all(os.path.exists(os.path.join(directory, filename)) for filename in files):
+        rows, stats = measure(generate, directory, n_postings, trace=trace)
+        record('generate', 'synthetic_data.generate', stats, **rows)
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        close_all()
+        if os.path.exists(DB_PATH):
+            os.remove(DB_PATH)
+
+        ingest_kwargs = {'batch_size': batch_size} if batch_size else {}
+        _, stats = measure(ingest_sources, list(files), DB_PATH, trace=trace, **ingest_kwargs)
+        record('build', 'ingest_sources', stats)
+
+        conn = sqlite3.connect(DB_PATH)
+        _, stats = measure(create_indexes, conn, BASE_INDEXES, trace=False)
+        record('build', 'create_indexes:base', stats)
+
+        for engine in engines:
+            for name in build_order():
+                builder = SUMMARY_REGISTRY[name]['build']
+                _, stats = measure(builder, DB_PATH, trace=trace, engine=engine)
+                record('build', builder.__name__, stats, engine=engine)
+
+        _, stats = measure(create_indexes, conn, SUMMARY_INDEXES, trace=False)
+        record('build', 'create_indexes:summary', stats)
+        conn.execute("ANALYZE")
+        conn.close()
+
+        if QUERY_ENGINE == 'duckdb':
+            version, stats = measure(export_tables, DB_PATH, serving_tables(), trace=trace)
+            record('build', 'export_tables', stats)
+            publish_export(version)
+
+        # Dibangun sekali lalu di-cache, dipakai case backend='bitmap'
+        _, stats = measure(bitmap_index, DB_PATH, trace=False)
+        record('load', 'bitmap_index', stats)
+
+        for name, load, kwargs in load_cases():
+            _, stats = measure(uncached(load), repeat=repeat, trace=trace, **kwargs)
+            record('load', name, stats, **kwargs)
+    finally:
+        close_all()
+        os.chdir(cwd)
+    return results
+
+
+def _key(result):
+    return (result['scale'], result['phase'], result['name'], json.dumps(result['params'], sort_keys=True))
+
+
+# Hasil yang lebih lambat dari baseline lebih dari tolerance (relatif)
+def regressions(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    previous = {_key(result): result for result in baseline['results']}
+    slower = []
+    for result in results:
+        old = previous.get(_key(result))
+        if old is None or result['seconds'] - old['seconds'] < REGRESSION_MIN_SECONDS:
+            continue
+        if result['seconds'] > old['seconds'] * (1 + tolerance):
+            slower.append({
+                'key': _key(result),
+                'seconds': result['seconds'],
+                'baseline_seconds': old['seconds'],
+                'ratio': round(result['seconds'] / old['seconds'], 3) if old['seconds'] else None,
+            })
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark create_* and load_* on synthetic data.")
+    parser.add_argument('--scales', default=DEFAULT_SCALES,
+                        help="comma separated posting counts, e.g. 10k,100k,1m,10m (default: %(default)s)")
+    parser.add_argument('--engines', default='sqlite',
+                        help=f"build engines to benchmark, comma separated from {', '.join(ENGINES)} (default: %(default)s)")
+    parser.add_argument('--work-dir', default=WORK_DIR,
+                        help="where generated data and databases are kept (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=LOAD_REPEAT,
+                        help="runs per load_* case, fastest is reported (default: %(default)s)")
+    parser.add_argument('--batch-size', type=int, help="ingest batch size")
+    parser.add_argument('--no-trace-alloc', action='store_true',
+                        help="skip the extra tracemalloc run per measurement")
+    parser.add_argument('--out', default=RESULTS_PATH, help="results JSON (default: %(default)s)")
+    parser.add_argument('--baseline', help="earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help="allowed slowdown vs baseline, relative (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    engines = [engine.strip() for engine in args.engines.split(',')]
+    started = time.perf_counter()
+    results = []
+    for label in args.scales.split(','):
+        label = label.strip().lower()
+        results += bench_scale(label, parse_scale(label), os.path.abspath(args.work_dir), engines,
+                               args.repeat, args.batch_size, trace=not args.no_trace_alloc)
+
+    report = {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'total_seconds': round(time.perf_counter() - started, 3),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sqlite': sqlite3.sqlite_version,
+            'pandas': pd.__version__,
+            'cpu_count': os.cpu_count(),
+            'engines': engines,
+            'query_engine': QUERY_ENGINE,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = regressions(results, json.load(f), args.tolerance)
+        for slower in report['regressions']:
+            print(f"[bench] slower than baseline: {slower['key']} "
+                  f"{slower['baseline_seconds']:.4f}s -> {slower['seconds']:.4f}s")
+
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] {len(results)} measurements -> {args.out}")
+    if report.get('regressions'):
+        raise SystemExit(f"{len(report['regressions'])} measurements regressed more than {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
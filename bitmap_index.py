@@ -0,0 +1,232 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from db import DB_PATH, db_generation, read_sql
+from tracing import span
+
+# Index bitmap di memori atas semua posting: tiap job_title_short, schedule type,
+# skill dan skill type punya bitset (np.packbits) posting id. Filter apa pun,
+# termasuk multi-select, diselesaikan dengan OR dalam satu dimensi lalu AND antar
+# dimensi, tanpa SQL. Dibangun sekali per proses per generasi file DB (selalu
+# dari tabel di SQLite, apa pun QUERY_ENGINE).
+_lock = threading.Lock()
+_indexes = {}    # {(db_path, generation): index}
+
+# Posting id = posisi setelah diurutkan per job_title_id (NULL di depan), jadi
+# jumlah job_title unik dari sebuah bitset = jumlah run job_title yang kena
+POSTINGS_QUERY = """
+    SELECT
+        j.job_id,
+        jts.job_title_short_id,
+        jt.job_title_id,
+        sch.schedule_type_id,
+        CAST(julianday(DATE(j.job_posted_date)) - 2440587.5 AS INTEGER) AS posted_day
+    FROM job_postings_fact j
+    LEFT JOIN dim_job_title_short jts ON jts.job_title_short = j.job_title_short
+    LEFT JOIN dim_job_title jt ON jt.job_title = j.job_title
+    LEFT JOIN dim_schedule_type sch ON sch.job_schedule_type = j.job_schedule_type
+    ORDER BY jt.job_title_id, j.job_id
+"""
+
+# Pasangan posting-skill dari posting_skill_fact (skill tanpa label: skill_id NULL)
+PAIRS_QUERY = """
+    SELECT job_id, skill_id, skill_type_id
+    FROM posting_skill_fact
+"""
+
+# Skill dengan label NULL ikut dihitung di total Top Skills, tapi tidak pernah
+# tampil sebagai skill (sama seperti summary SQL)
+SKILLS_QUERY = """
+    SELECT s.skill_id, s.skills, st.skill_type_id
+    FROM skills_dim s
+    LEFT JOIN dim_skill_type st ON st.skill_type = s.type
+    WHERE s.skills IS NOT NULL
+"""
+
+# nama filter -> (tabel dimensi, kolom id, kolom label)
+FILTER_DIMENSIONS = {
+    'job_title_short': ('dim_job_title_short', 'job_title_short_id', 'job_title_short'),
+    'job_schedule_type': ('dim_schedule_type', 'schedule_type_id', 'job_schedule_type'),
+    'skill_type': ('dim_skill_type', 'skill_type_id', 'skill_type'),
+}
+
+
+def _bitset(positions, n):
+    mask = np.zeros(n, dtype=bool)
+    mask[positions] = True
+    return np.packbits(mask)
+
+
+def _bitsets(keys, positions, n):
+    # {id: bitset}, satu per nilai keys (NULL dilewati)
+    groups = pd.Series(positions).groupby(np.asarray(keys, dtype=np.float64)).indices
+    positions = np.asarray(positions)
+    return {int(key): _bitset(positions[rows], n) for key, rows in groups.items()}
+
+
+def _run_starts(*keys):
+    keys = [np.asarray(key) for key in keys]
+    if not len(keys[0]):
+        return np.array([], dtype=np.int64)
+    changed = np.zeros(len(keys[0]) - 1, dtype=bool)
+    for key in keys:
+        changed |= key[1:] != key[:-1]
+    return np.flatnonzero(np.r_[True, changed])
+
+
+def _any_per_run(mask, starts):
+    if not len(starts):
+        return np.array([], dtype=bool)
+    return np.logical_or.reduceat(mask, starts)
+
+
+def build_bitmap_index(db_path=DB_PATH):
+    postings = read_sql(POSTINGS_QUERY, db_path=db_path, engine='sqlite')
+    pairs = read_sql(PAIRS_QUERY, db_path=db_path, engine='sqlite')
+    skills = read_sql(SKILLS_QUERY, db_path=db_path, engine='sqlite')
+    n = len(postings)
+    job_title_id = postings['job_title_id'].to_numpy(dtype=np.float64)
+
+    # job_id -> posting id; pasangan tanpa posting tidak ikut (sama seperti JOIN)
+    posting = pd.Series(np.arange(n), index=postings['job_id']).reindex(pairs['job_id']).to_numpy()
+    pairs = pairs.assign(posting=posting).dropna(subset=['posting'])
+    pairs['posting'] = pairs['posting'].astype(np.int64)
+
+    # Pasangan (skill, posting) urut skill lalu posting -> run per (skill, job_title).
+    # Posting tanpa job_title jadi run sendiri (-1): tidak dihitung, tapi skill-nya
+    # tetap dianggap muncul di filter (sama seperti GROUP BY di SQL)
+    labelled = pairs[pairs['skill_id'].isin(skills['skill_id'])].sort_values(['skill_id', 'posting'], kind='stable')
+    pair_posting = labelled['posting'].to_numpy()
+    pair_skill = labelled['skill_id'].to_numpy()
+    pair_title = np.nan_to_num(job_title_id[pair_posting], nan=-1)
+    pair_runs = _run_starts(pair_skill, pair_title)
+
+    first_titled = int(np.isnan(job_title_id).sum())
+    labels = {}
+    for name, (table, id_col, label_col) in FILTER_DIMENSIONS.items():
+        df = read_sql(f"SELECT {id_col} AS id, {label_col} AS label FROM {table}", db_path=db_path, engine='sqlite')
+        # Schedule type NOCASE di SQLite -> lookup case-insensitive
+        keys = df['label'].str.lower() if name == 'job_schedule_type' else df['label']
+        labels[name] = dict(zip(keys, df['id']))
+
+    return {
+        'n': n,
+        'job_title_id': job_title_id,
+        'posted_day': postings['posted_day'].to_numpy(dtype=np.float64),
+        'title_runs': first_titled + _run_starts(job_title_id[first_titled:]),
+        'bitsets': {
+            'job_title_short': _bitsets(postings['job_title_short_id'], np.arange(n), n),
+            'job_schedule_type': _bitsets(postings['schedule_type_id'], np.arange(n), n),
+            'skill_type': _bitsets(pairs['skill_type_id'], pairs['posting'], n),
+            'skill': _bitsets(pairs['skill_id'], pairs['posting'], n),
+            'has_skill': _bitset(pairs['posting'].to_numpy(), n),
+        },
+        'pair_posting': pair_posting,
+        'pair_runs': pair_runs,
+        'pair_run_skill': pair_skill[pair_runs],
+        'pair_run_titled': pair_title[pair_runs] >= 0,
+        'skills': skills,
+        'labels': labels,
+    }
+
+
+def bitmap_index(db_path=DB_PATH):
+    key = (db_path, db_generation(db_path))
+    with span('index', 'bitmap_index') as record, _lock:
+        record['cache'] = 'hit'
+        if key not in _indexes:
+            record['cache'] = 'miss'
+            for old in [old for old in _indexes if old[0] == db_path]:
+                del _indexes[old]
+            _indexes[key] = build_bitmap_index(db_path)
+        return _indexes[key]
+
+
+def _ids(index, name, value):
+    values = value if isinstance(value, (list, tuple)) else [value]
+    lookup = index['labels'][name]
+    keys = [v.lower() for v in values] if name == 'job_schedule_type' else values
+    return [lookup[key] for key in keys if key in lookup]
+
+
+# Bitset posting untuk satu filter: OR semua nilai yang dipilih. None = tanpa filter.
+def filter_bitset(index, name, value):
+    if not value:
+        return None
+    bitsets = index['bitsets'][name]
+    result = np.zeros_like(index['bitsets']['has_skill'])
+    for id_ in _ids(index, name, value):
+        if id_ in bitsets:
+            result |= bitsets[id_]
+    return result
+
+
+def posting_mask(index, base='has_skill', **filters):
+    bits = index['bitsets'][base].copy()
+    for name, value in filters.items():
+        selected = filter_bitset(index, name, value)
+        if selected is not None:
+            bits &= selected
+    return np.unpackbits(bits, count=index['n']).astype(bool)
+
+
+def count_titles(index, mask):
+    return int(_any_per_run(mask, index['title_runs']).sum())
+
+
+# Jumlah job_title unik per skill (label tidak NULL) di antara posting mask
+def skill_title_counts(index, mask):
+    hits = _any_per_run(mask[index['pair_posting']], index['pair_runs'])
+    per_skill = pd.DataFrame({
+        'job_count': hits & index['pair_run_titled'],
+        'present': hits,
+    }, index=index['pair_run_skill']).groupby(level=0).sum()
+    per_skill = per_skill.reindex(index['skills']['skill_id'], fill_value=0)
+    return index['skills'].assign(
+        job_count=per_skill['job_count'].to_numpy(),
+        present=per_skill['present'].to_numpy() > 0,
+    )
+
+
+def _top(counts, top_n):
+    counts = counts[counts['present']]
+    counts = counts.sort_values(['job_count', 'skill_id'], ascending=[False, True], kind='stable')
+    return counts if top_n is None else counts.head(top_n)
+
+
+# Sama dengan top_skill_counts_exact di preprocess_top_skills, tanpa SQL
+def bitmap_top_skills(index, job_title_short=None, skill_type=None, top_n=20):
+    mask = posting_mask(index, job_title_short=job_title_short, skill_type=skill_type)
+    total_jobs = count_titles(index, mask)
+
+    counts = skill_title_counts(index, posting_mask(index, job_title_short=job_title_short))
+    if skill_type:
+        counts = counts[counts['skill_type_id'].isin(_ids(index, 'skill_type', skill_type))]
+    top_skills_df = _top(counts, top_n)[['skills', 'job_count']].reset_index(drop=True)
+    return total_jobs, top_skills_df
+
+
+# Sama dengan demand_skills_query: top 5 skill lalu jumlah job_title unik per hari
+# (posted_day = hari sejak 1970-01-01, di-decode di load_demand_skills)
+def bitmap_demand_skills(index, job_title_short=None, job_schedule_type=None, top_k=5):
+    mask = posting_mask(index, job_title_short=job_title_short, job_schedule_type=job_schedule_type)
+    top = _top(skill_title_counts(index, mask), top_k)
+
+    frames = []
+    for skill_id, skill in zip(top['skill_id'], top['skills']):
+        selected = np.flatnonzero(mask & np.unpackbits(index['bitsets']['skill'][skill_id], count=index['n']).astype(bool))
+        frame = pd.DataFrame({
+            'posted_day': index['posted_day'][selected],
+            'job_title_id': index['job_title_id'][selected],
+        })
+        # Posting tanpa tanggal tidak masuk cube SQL (posted_day IS NOT NULL)
+        frame = frame.groupby('posted_day')['job_title_id'].nunique().reset_index(name='count')
+        frames.append(frame.assign(skills=skill))
+
+    if not frames:
+        return pd.DataFrame(columns=['posted_day', 'skills', 'count'])
+    result = pd.concat(frames, ignore_index=True)
+    result = result.sort_values(['posted_day', 'skills'], kind='stable', na_position='first')
+    return result[['posted_day', 'skills', 'count']].reset_index(drop=True)
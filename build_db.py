@@ -0,0 +1,446 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from columnar import ENGINES, export_path, export_tables, publish_export, set_build_source
+from engine_parity import build_parity, serving_parity
+from config import BUILD_ENGINE, BUILD_WORKERS, QUERY_ENGINE, REQUIRE_SOURCE_PINS, SUMMARY_PARQUET_DIR
+from db import DB_PATH
+from load_data import download_parquet_files, files, unpinned_sources, write_source_pins
+from ingest import INGEST_BATCH_SIZE, ingest_parquet_files
+from indexes import BASE_INDEXES, SUMMARY_INDEXES, create_indexes, verify_query_plans
+from build_manifest import (
+    ensure_manifest_table, existing_tables, forget_summaries, read_manifest, record_source, record_summary,
+    refresh_sources, sources_digest, stale_sources, stale_summaries, table_name,
+)
+# Import modul preprocess_* mendaftarkan summary-nya ke SUMMARY_REGISTRY
+import preprocess_demand_skills
+import preprocess_dimensions
+import preprocess_fact
+import preprocess_filter_results
+import preprocess_introduction
+import preprocess_posting_skill
+from preprocess_location import geocode_coverage
+from preprocess_top_skills import sketch_error_report
+from summary_registry import SUMMARY_REGISTRY, build_order, dependencies, schema_problems, with_dependents
+from tracing import export_jsonl, span, write_metrics
+
+REPORT_PATH = 'build_report.json'
+
+# Tabel output summary versi lama yang sudah tidak ditulis siapa pun; dihapus
+# dari DB build supaya tidak ikut memakan tempat
+RETIRED_TABLES = ['demand_skill_trend']
+
+
+def summary_specs():
+    return [(name, SUMMARY_REGISTRY[name]['version'], SUMMARY_REGISTRY[name]['tables']) for name in build_order()]
+
+
+def ingest_sources(filenames, db_path=DB_PATH, batch_size=INGEST_BATCH_SIZE):
+    stats = ingest_parquet_files(
+        db_path, {filename: table_name(filename) for filename in filenames}, batch_size
+    )
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_manifest_table(conn)
+        for filename in filenames:
+            record_source(conn, filename, files[filename])
+    finally:
+        conn.close()
+    return stats
+
+
+# DB live dibuka read-only: reader di db.py memegang koneksi immutable ke file
+# yang sama, jadi file itu tidak pernah ditulis langsung
+def read_only_connection(db_path):
+    return sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+
+
+# Dipakai app: artifact siap kalau semua summary sudah dibuild dengan versi kode
+# sekarang dari source yang tercatat di manifest. Tidak butuh file parquet.
+def artifact_ready(db_path=DB_PATH):
+    if not os.path.exists(db_path):
+        return False
+    conn = read_only_connection(db_path)
+    try:
+        return not stale_summaries(conn, summary_specs(), sources_digest(conn, files))
+    except sqlite3.Error as e:
+        print(f"Error checking {db_path}: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+# Ringkasan error sketch HyperLogLog vs COUNT DISTINCT exact di Top Skills
+def sketch_error_summary(report):
+    errors = report['rel_error'].dropna()
+    return {
+        'cells': int(len(report)),
+        'missing_in_sketch_top': int(report['job_count_sketch'].isna().sum()),
+        'max_rel_error': float(errors.max()),
+        'mean_rel_error': round(float(errors.mean()), 4),
+        'p95_rel_error': round(float(errors.quantile(0.95)), 4),
+    }
+
+
+# Tabel yang dibaca load_* (untuk export parquet / QUERY_ENGINE='duckdb')
+def serving_tables():
+    return [table for _, _, outputs in summary_specs() for table in outputs] + ['skills_dim']
+
+
+# Dijalankan di proses worker: build satu summary ke DB staging-nya sendiri.
+# Source dan output summary dependensi dibaca dari db_path lewat ATTACH.
+def build_staged(name, db_path, staging_path, engine=BUILD_ENGINE):
+    if os.path.exists(staging_path):
+        os.remove(staging_path)
+    sqlite3.connect(staging_path).close()
+    set_build_source(staging_path, db_path)
+    started = time.perf_counter()
+    SUMMARY_REGISTRY[name]['build'](staging_path, engine=engine)
+    return round(time.perf_counter() - started, 3)
+
+
+# Salin tabel output dari DB staging ke DB build dalam satu transaksi, pakai
+# CREATE TABLE aslinya (tipe kolom, PRIMARY KEY, WITHOUT ROWID ikut)
+def merge_staging(conn, staging_path, tables):
+    conn.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in tables:
+                row = conn.execute(
+                    "SELECT sql FROM staging.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()
+                if row is None:
+                    raise RuntimeError(f"{staging_path} tidak berisi tabel {table}")
+                conn.execute(f'DROP TABLE IF EXISTS main."{table}"')
+                conn.execute(row[0])
+                conn.execute(f'INSERT INTO main."{table}" SELECT * FROM staging."{table}"')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute("DETACH DATABASE staging")
+
+
+# Build summary names sesuai DAG di summary_registry. workers > 1: summary yang
+# dependensinya sudah selesai langsung jalan di proses worker (DB staging
+# sendiri), lalu di-merge ke db_path begitu selesai; DB build sementara pakai
+# WAL supaya merge tidak menunggu worker yang sedang membaca.
+def build_summaries(conn, db_path, names, digest, engine=BUILD_ENGINE, workers=BUILD_WORKERS):
+    order = [name for name in build_order() if name in names]
+    steps = []
+
+    def finish(name, seconds, **extra):
+        problems = schema_problems(conn, name)
+        if problems:
+            raise RuntimeError(f"summary {name} tidak sesuai skema: {'; '.join(problems)}")
+        record_summary(conn, name, SUMMARY_REGISTRY[name]['version'], digest)
+        steps.append({'step': name, 'seconds': seconds, **extra})
+        print(f"[build] {name}: {seconds:.2f}s")
+
+    if workers <= 1 or len(order) <= 1:
+        for name in order:
+            with span('build', name) as record:
+                record['cache'] = 'miss'
+                SUMMARY_REGISTRY[name]['build'](db_path, engine=engine)
+            finish(name, round(record['ms'] / 1000, 3))
+        return steps
+
+    staging_dir = f"{db_path}.staging"
+    os.makedirs(staging_dir, exist_ok=True)
+    deps = {name: dependencies(name) & set(order) for name in order}
+    pending, running, done = list(order), {}, set()
+    conn.execute("PRAGMA journal_mode = WAL")
+    try:
+        # spawn: worker tidak mewarisi koneksi SQLite / thread proses ini
+        with ProcessPoolExecutor(min(workers, len(order)), mp_context=multiprocessing.get_context('spawn')) as pool:
+            while pending or running:
+                for name in [name for name in pending if deps[name] <= done]:
+                    pending.remove(name)
+                    staging_path = os.path.join(staging_dir, f"{name}.db")
+                    running[pool.submit(build_staged, name, db_path, staging_path, engine)] = (name, staging_path)
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, staging_path = running.pop(future)
+                    seconds = future.result()
+                    with span('build', f"merge:{name}") as record:
+                        merge_staging(conn, staging_path, SUMMARY_REGISTRY[name]['tables'])
+                    finish(name, seconds, merge_seconds=round(record['ms'] / 1000, 3))
+                    os.remove(staging_path)
+                    done.add(name)
+    finally:
+        conn.execute("PRAGMA journal_mode = DELETE")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return steps
+
+
+# Lock antar proses per file DB: cuma satu builder per host, yang lain
+# menunggu lalu memakai hasilnya. Yield lama menunggu (detik).
+@contextmanager
+def build_lock(db_path=DB_PATH):
+    with open(f"{db_path}.lock", 'a+') as f:
+        started = time.perf_counter()
+        with span('build', 'lock'):
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+        try:
+            yield round(time.perf_counter() - started, 3)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# Ada yang harus ditulis ke DB? (source / summary basi, entri manifest summary
+# yang sudah tidak terdaftar, tabel pensiun, index kurang)
+def needs_rebuild(db_path=DB_PATH, force=False):
+    if force or not os.path.exists(db_path):
+        return True
+    conn = read_only_connection(db_path)
+    try:
+        if stale_sources(conn, files)[0] or stale_summaries(conn, summary_specs(), sources_digest(conn, files)):
+            return True
+        if any(kind == 'summary' and name not in SUMMARY_REGISTRY for kind, name in read_manifest(conn)):
+            return True
+        if existing_tables(conn) & set(RETIRED_TABLES):
+            return True
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        return any(name not in indexes for name, _, _ in BASE_INDEXES + SUMMARY_INDEXES)
+    except sqlite3.Error:
+        return True
+    finally:
+        conn.close()
+
+
+def _fsync(path, directory=False):
+    if directory and os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Build ulang selalu di salinan DB (<db>.building), lalu di-swap atomik dengan
+# os.replace (export parquet ikut di-publish sesudahnya, lihat
+# columnar.publish_export). Reader yang masih membuka DB lama (koneksi immutable di db.py)
+# selesai di inode lama; koneksi baru otomatis ke generation baru. Kalau tidak
+# ada yang basi, build hanya membaca DB live (cek plan, export, parity).
+def build(db_path=DB_PATH, force=False, vacuum=True, batch_size=INGEST_BATCH_SIZE, sketch_report=None,
+          engine=BUILD_ENGINE, export=QUERY_ENGINE == 'duckdb', check_parity=False, workers=BUILD_WORKERS):
+    started = time.perf_counter()
+    with build_lock(db_path) as lock_wait:
+        staged = needs_rebuild(db_path, force)
+        work_path = f"{db_path}.building" if staged else db_path
+        if staged:
+            # Sisa build yang gagal / mati di tengah jalan
+            if os.path.exists(work_path):
+                os.remove(work_path)
+            if os.path.exists(db_path) and not force:
+                shutil.copyfile(db_path, work_path)
+        try:
+            report = _build(work_path, staged, force, vacuum, batch_size, sketch_report, engine, export,
+                            check_parity, workers)
+            if staged:
+                _fsync(work_path)
+                os.replace(work_path, db_path)
+                _fsync(os.path.dirname(os.path.abspath(db_path)), directory=True)
+            # Export parquet di-publish tepat setelah DB-nya, jadi reader DuckDB
+            # tidak pernah melihat export setengah jadi
+            if report['export_version']:
+                publish_export(report['export_version'])
+        finally:
+            if staged and os.path.exists(work_path):
+                os.remove(work_path)
+
+    report['steps'].insert(0, {'step': 'lock', 'seconds': lock_wait})
+    report['staged'] = staged
+    report['source_pins'] = {'required': REQUIRE_SOURCE_PINS, 'unpinned': unpinned_sources()}
+    report['total_seconds'] = round(time.perf_counter() - started, 3)
+    report['file_sizes'] = {path: os.path.getsize(path) for path in [db_path, *files] if os.path.exists(path)}
+    return {'db_path': db_path, **report}
+
+
+def _build(db_path, staged, force, vacuum, batch_size, sketch_report, engine, export, check_parity, workers):
+    steps = []
+
+    def timed(step, func, *args, cache=None, **kwargs):
+        with span('build', step) as record:
+            record['cache'] = cache
+            result = func(*args, **kwargs)
+        steps.append({'step': step, 'seconds': round(record['ms'] / 1000, 3)})
+        print(f"[build] {step}: {steps[-1]['seconds']:.2f}s")
+        return result
+
+    # Tanpa staging (needs_rebuild: tidak ada yang basi) db_path adalah DB live:
+    # hanya dibaca untuk cek plan, export dan parity
+    conn = sqlite3.connect(db_path) if staged else read_only_connection(db_path)
+    try:
+        created = []
+        stale = set()
+        if staged:
+            ensure_manifest_table(conn)
+            sources, refreshed = (list(files), []) if force else stale_sources(conn, files)
+            refresh_sources(conn, refreshed)
+            if sources:
+                timed('download', download_parquet_files)
+                for stat in ingest_sources(sources, db_path, batch_size):
+                    steps.append({'step': f"ingest:{stat['table']}", **stat})
+
+            created = timed('indexes:base', create_indexes, conn, BASE_INDEXES)
+
+            # Summary yang dibuild ulang ikut membuat basi semua yang membaca output-nya
+            digest = sources_digest(conn, files)
+            stale = set(SUMMARY_REGISTRY) if force else with_dependents(stale_summaries(conn, summary_specs(), digest))
+        for name in build_order():
+            if name not in stale:
+                with span('build', name) as record:
+                    record['cache'] = 'hit'
+                steps.append({'step': name, 'seconds': 0.0, 'skipped': True})
+        if staged:
+            if stale:
+                steps.extend(timed('summaries', build_summaries, conn, db_path, stale, digest, engine, workers))
+            forget_summaries(conn, list(SUMMARY_REGISTRY))
+            for table in RETIRED_TABLES:
+                conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            conn.commit()
+
+            created += timed('indexes:summary', create_indexes, conn, SUMMARY_INDEXES)
+
+        rebuilt = created or any(
+            not step.get('skipped') and not step['step'].startswith('indexes:') for step in steps
+        )
+        if vacuum and rebuilt:
+            timed('analyze', conn.execute, "ANALYZE")
+            timed('vacuum', conn.execute, "VACUUM")
+
+        plan_problems = verify_query_plans(conn)
+        for problem in plan_problems:
+            print(f"[build] full scan in {problem['query']}: {problem['plan']}")
+
+        sketch_errors = None
+        if sketch_report or not any(
+            step.get('skipped') for step in steps if step['step'] == 'top_skills'
+        ):
+            errors = timed('sketch_error_report', sketch_error_report, db_path)
+            sketch_errors = sketch_error_summary(errors)
+            print(f"[build] sketch error: max {sketch_errors['max_rel_error']:.2%}, "
+                  f"p95 {sketch_errors['p95_rel_error']:.2%} over {sketch_errors['cells']} counts")
+            if sketch_report:
+                errors.to_csv(sketch_report, index=False)
+
+        coverage = geocode_coverage(conn)
+        print(f"[build] geocoded {1 - coverage['unmatched']:.1%} of {coverage['postings']} postings "
+              f"({coverage['city']:.1%} to a city)")
+
+        # Export ke direktori versi baru; di-publish build() setelah DB di-swap
+        exported = all(
+            os.path.exists(os.path.join(export_path(), f"{table}.parquet")) for table in serving_tables()
+        )
+        export_version = None
+        if export and (rebuilt or not exported):
+            export_version = timed('export_parquet', export_tables, db_path, serving_tables())
+
+        parity_problems = None
+        if check_parity:
+            parity_problems = timed('parity:build', build_parity, db_path)
+            if export_version or os.path.isdir(export_path()):
+                parity_problems += timed('parity:serving', serving_parity, db_path, export_version)
+            for problem in parity_problems:
+                print(f"[build] engine mismatch in {problem['query']}: {problem['problem']}")
+
+        tables = {
+            name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            for name in sorted(existing_tables(conn))
+        }
+    finally:
+        conn.close()
+
+    return {
+        'engine': engine,
+        'built_at': datetime.now(timezone.utc).isoformat(),
+        'steps': steps,
+        'tables': tables,
+        'indexes_created': created,
+        'query_plan_problems': plan_problems,
+        'sketch_errors': sketch_errors,
+        'geocode_coverage': coverage,
+        'parity_problems': parity_problems,
+        'export_version': export_version,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build jobs_skills.db ahead of deploy.")
+    parser.add_argument('--db', default=DB_PATH, help="output SQLite file (default: %(default)s)")
+    parser.add_argument('--report', default=REPORT_PATH, help="build report JSON (default: %(default)s)")
+    parser.add_argument('--force', action='store_true', help="re-ingest and rebuild everything")
+    parser.add_argument('--no-vacuum', action='store_true', help="skip ANALYZE/VACUUM at the end")
+    parser.add_argument('--batch-size', type=int, default=INGEST_BATCH_SIZE,
+                        help="parquet rows per insert batch (default: %(default)s)")
+    parser.add_argument('--strict-plans', action='store_true',
+                        help="fail if any dashboard query plan does a full table scan")
+    parser.add_argument('--pin-sources', action='store_true',
+                        help="write the size/sha256 of the current parquet files to the source lock file")
+    parser.add_argument('--sketch-report', metavar='CSV',
+                        help="write the per-filter sketch vs exact job title counts to CSV")
+    parser.add_argument('--engine', choices=ENGINES, default=BUILD_ENGINE,
+                        help="engine for the summary queries (default: %(default)s)")
+    parser.add_argument('--export-parquet', action='store_true', default=QUERY_ENGINE == 'duckdb',
+                        help=f"export the served tables to {SUMMARY_PARQUET_DIR}/ for JOBS_QUERY_ENGINE=duckdb")
+    parser.add_argument('--workers', type=int, default=BUILD_WORKERS,
+                        help="worker processes for independent summaries; 1 = sequential (default: %(default)s)")
+    parser.add_argument('--check-parity', action='store_true',
+                        help="compare SQLite and DuckDB results; fail on any difference")
+    parser.add_argument('--trace', metavar='JSONL',
+                        help="write the build trace spans (download, ingest, create_*, ...) as JSON lines")
+    args = parser.parse_args(argv)
+
+    if args.pin_sources:
+        download_parquet_files()
+        for filename, pin in write_source_pins().items():
+            print(f"[build] pinned {filename}: {pin['size']:,} bytes, sha256 {pin['sha256'][:12]}")
+        return
+
+    report = build(args.db, force=args.force, vacuum=not args.no_vacuum, batch_size=args.batch_size,
+                   sketch_report=args.sketch_report, engine=args.engine,
+                   export=args.export_parquet, check_parity=args.check_parity, workers=args.workers)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.trace:
+        export_jsonl(args.trace)
+    write_metrics()
+    print(f"[build] done in {report['total_seconds']:.2f}s, report -> {args.report}")
+    if args.check_parity and report['parity_problems']:
+        raise SystemExit(f"{len(report['parity_problems'])} queries differ between SQLite and DuckDB")
+    if args.strict_plans and report['query_plan_problems']:
+        raise SystemExit(f"{len(report['query_plan_problems'])} dashboard queries do a full table scan")
+
+
+if __name__ == '__main__':
+    main()
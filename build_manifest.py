@@ -0,0 +1,143 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+
+MANIFEST_TABLE = 'build_manifest'
+
+# kind = 'source'  -> version = sha256 isi parquet, inputs = id file Drive
+# kind = 'summary' -> version = versi kode create_*, inputs = digest semua source
+MANIFEST_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        version TEXT NOT NULL,
+        inputs TEXT,
+        size INTEGER,
+        mtime_ns INTEGER,
+        built_at TEXT NOT NULL,
+        PRIMARY KEY (kind, name)
+    )
+"""
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ensure_manifest_table(conn):
+    conn.execute(MANIFEST_SCHEMA)
+    conn.commit()
+
+
+# Tanpa tabel manifest (DB lama / belum dibuild) hasilnya kosong: semua source
+# dan summary dianggap basi. Tidak menulis apa pun, aman di koneksi read-only.
+def read_manifest(conn):
+    if MANIFEST_TABLE not in existing_tables(conn):
+        return {}
+    rows = conn.execute(
+        f"SELECT kind, name, version, inputs, size, mtime_ns FROM {MANIFEST_TABLE}"
+    ).fetchall()
+    return {
+        (kind, name): {'version': version, 'inputs': inputs, 'size': size, 'mtime_ns': mtime_ns}
+        for kind, name, version, inputs, size, mtime_ns in rows
+    }
+
+
+def existing_tables(conn):
+    cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _write_entry(conn, kind, name, version, inputs, size=None, mtime_ns=None):
+    conn.execute(
+        f"INSERT OR REPLACE INTO {MANIFEST_TABLE} "
+        "(kind, name, version, inputs, size, mtime_ns, built_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (kind, name, version, inputs, size, mtime_ns, datetime.now(timezone.utc).isoformat()),
+    )
+    conn.commit()
+
+
+def table_name(filename):
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+# File lokal hanya di-hash ulang kalau size/mtime beda dari manifest, jadi
+# kasus normal cuma beberapa os.stat. Kalau file tidak ada (DB prebuilt tanpa
+# parquet), hash di manifest dipercaya selama id file Drive tidak berubah.
+# Tidak menulis apa pun: file yang isinya sama tapi size/mtime-nya berubah
+# (mis. di-copy ulang) dikembalikan di refreshed, ditulis lewat refresh_sources.
+def stale_sources(conn, files):
+    manifest = read_manifest(conn)
+    tables = existing_tables(conn)
+    stale = []
+    refreshed = []
+    for filename, file_id in files.items():
+        entry = manifest.get(('source', filename))
+        if entry is None or entry['inputs'] != file_id or table_name(filename) not in tables:
+            stale.append(filename)
+            continue
+        if not os.path.exists(filename):
+            continue
+        stat = os.stat(filename)
+        if (stat.st_size, stat.st_mtime_ns) == (entry['size'], entry['mtime_ns']):
+            continue
+        if file_sha256(filename) != entry['version']:
+            stale.append(filename)
+        else:
+            refreshed.append((filename, entry['version'], file_id, stat.st_size, stat.st_mtime_ns))
+    return stale, refreshed
+
+
+def refresh_sources(conn, refreshed):
+    for filename, version, file_id, size, mtime_ns in refreshed:
+        _write_entry(conn, 'source', filename, version, file_id, size, mtime_ns)
+
+
+def record_source(conn, filename, file_id):
+    stat = os.stat(filename)
+    _write_entry(conn, 'source', filename, file_sha256(filename), file_id,
+                 stat.st_size, stat.st_mtime_ns)
+
+
+def sources_digest(conn, files):
+    manifest = read_manifest(conn)
+    digest = hashlib.sha256()
+    for filename in sorted(files):
+        entry = manifest.get(('source', filename))
+        digest.update(f"{filename}:{entry['version'] if entry else ''}\n".encode())
+    return digest.hexdigest()
+
+
+# summaries = list of (name, version, output_tables). Stale kalau belum pernah
+# dibuat, versi kode berubah, digest source berubah, atau tabel outputnya hilang.
+def stale_summaries(conn, summaries, digest):
+    manifest = read_manifest(conn)
+    tables = existing_tables(conn)
+    stale = []
+    for name, version, outputs in summaries:
+        entry = manifest.get(('summary', name))
+        if (
+            entry is None
+            or entry['version'] != str(version)
+            or entry['inputs'] != digest
+            or not set(outputs).issubset(tables)
+        ):
+            stale.append(name)
+    return stale
+
+
+def record_summary(conn, name, version, digest):
+    _write_entry(conn, 'summary', name, str(version), digest)
+
+
+# Hapus entri summary yang sudah tidak terdaftar (mis. nama lama)
+def forget_summaries(conn, keep):
+    placeholders = ", ".join("?" for _ in keep)
+    conn.execute(
+        f"DELETE FROM {MANIFEST_TABLE} WHERE kind = 'summary' AND name NOT IN ({placeholders})", list(keep)
+    )
+    conn.commit()
@@ -0,0 +1,264 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from build_manifest import table_name
+from config import BUILD_ENGINE, SUMMARY_PARQUET_DIR
+from ingest import sqlite_type, to_sqlite_values
+from load_data import files
+
+try:
+    import duckdb
+except ImportError:  # opsional, hanya untuk engine 'duckdb'
+    duckdb = None
+
+ENGINES = ('sqlite', 'duckdb')
+
+# Summary dibuat dengan SQL yang sama di kedua engine. Yang beda dialek cuma
+# ekspresi di bawah ini; sisanya (strftime('%m', ..), DATE(..), COLLATE NOCASE)
+# jalan di SQLite maupun DuckDB.
+EPOCH_DAY = {
+    'sqlite': "CAST(julianday(DATE({column})) - 2440587.5 AS INTEGER)",
+    'duckdb': "CAST(CAST({column} AS DATE) - DATE '1970-01-01' AS INTEGER)",
+}
+
+_lock = threading.Lock()
+_serving = {}    # {(directory, direktori export, versi file): koneksi DuckDB}
+
+# Build paralel (build_db.build_summaries): tiap summary ditulis ke DB staging
+# sendiri. Tabel yang tidak ada di staging (source, output summary lain) dibaca
+# dari DB build lewat ATTACH: nama tabel tanpa schema dicari di main dulu, baru
+# di database yang di-attach. Hanya untuk koneksi baca; tulis tetap ke main.
+_build_sources = {}  # {path DB staging: path DB build}
+
+
+def require_duckdb():
+    if duckdb is None:
+        raise RuntimeError("engine 'duckdb' butuh package duckdb (pip install duckdb)")
+
+
+def set_build_source(db_path, source_path):
+    _build_sources[os.path.abspath(db_path)] = os.path.abspath(source_path)
+
+
+def attach_build_source(conn, db_path):
+    source = _build_sources.get(os.path.abspath(db_path))
+    if source is not None:
+        conn.execute("ATTACH DATABASE ? AS build_source", (source,))
+    return conn
+
+
+def build_connection(db_path):
+    return attach_build_source(sqlite3.connect(db_path), db_path)
+
+
+def epoch_day(column, engine=BUILD_ENGINE):
+    return EPOCH_DAY[engine].format(column=column)
+
+
+# Koneksi DuckDB untuk build: tabel source dibaca langsung dari parquet,
+# tabel kecil dari SQLite (mis. dim_*) di-copy ke memori
+def source_connection(db_path, sqlite_tables=()):
+    require_duckdb()
+    conn = duckdb.connect()
+    for filename in files:
+        path = os.path.abspath(filename).replace("'", "''")
+        conn.execute(f"CREATE VIEW {table_name(filename)} AS SELECT * FROM read_parquet('{path}')")
+    if sqlite_tables:
+        source = build_connection(db_path)
+        try:
+            for table in sqlite_tables:
+                conn.register(f"_{table}", pd.read_sql_query(f'SELECT * FROM "{table}"', source))
+                conn.execute(f'CREATE TABLE "{table}" AS SELECT * FROM "_{table}"')
+                conn.unregister(f"_{table}")
+        finally:
+            source.close()
+    return conn
+
+
+def write_arrow_table(conn, table, data):
+    columns = ", ".join(f'"{field.name}" {sqlite_type(field.type)}' for field in data.schema)
+    placeholders = ", ".join("?" for _ in data.schema)
+    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+    conn.execute(f'CREATE TABLE "{table}" ({columns})')
+    for batch in data.to_batches():
+        values = [to_sqlite_values(column) for column in batch.columns]
+        conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', zip(*values))
+
+
+# CREATE TABLE table AS select_sql di DB SQLite. Dengan engine 'duckdb' SELECT-nya
+# dijalankan DuckDB atas parquet (kolumnar), hasilnya ditulis ke SQLite.
+def create_table_as(db_path, table, select_sql, params=(), engine=BUILD_ENGINE, sqlite_tables=()):
+    if engine == 'sqlite':
+        conn = build_connection(db_path)
+        try:
+            conn.execute(f'DROP TABLE IF EXISTS main."{table}"')
+            conn.execute(f'CREATE TABLE main."{table}" AS {select_sql}', params)
+            conn.commit()
+        finally:
+            conn.close()
+        return
+
+    source = source_connection(db_path, sqlite_tables)
+    try:
+        data = source.execute(select_sql, list(params)).fetch_arrow_table()
+    finally:
+        source.close()
+    conn = sqlite3.connect(db_path)
+    try:
+        write_arrow_table(conn, table, data)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# Samakan dtype hasil DuckDB dengan pd.read_sql_query di SQLite: integer selalu
+# int64, dan integer yang ada NULL-nya jadi float64 (bukan Int64 nullable)
+def sqlite_dtypes(df):
+    for column in df.columns:
+        dtype = df[column].dtype
+        if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+            df[column] = df[column].astype('float64' if df[column].isna().any() else 'int64')
+        elif pd.api.types.is_float_dtype(dtype):
+            df[column] = df[column].astype('float64')
+    return df
+
+
+def run_query(db_path, select_sql, params=(), engine=BUILD_ENGINE, sqlite_tables=()):
+    # SELECT di engine tertentu tanpa menulis apa pun (dipakai cek parity)
+    if engine == 'sqlite':
+        conn = build_connection(db_path)
+        try:
+            return pd.read_sql_query(select_sql, conn, params=params)
+        finally:
+            conn.close()
+    source = source_connection(db_path, sqlite_tables)
+    try:
+        return sqlite_dtypes(source.execute(select_sql, list(params)).df())
+    finally:
+        source.close()
+
+
+# Seperti run_query, tapi hasilnya DataFrame per chunk (maks chunk_size baris),
+# untuk scan tabel besar tanpa memuat semuanya ke memori
+def iter_query(db_path, select_sql, params=(), engine=BUILD_ENGINE, chunk_size=500_000):
+    if engine == 'sqlite':
+        conn = build_connection(db_path)
+        try:
+            yield from pd.read_sql_query(select_sql, conn, params=params, chunksize=chunk_size)
+        finally:
+            conn.close()
+        return
+    source = source_connection(db_path)
+    try:
+        reader = source.execute(select_sql, list(params)).fetch_record_batch(chunk_size)
+        for batch in reader:
+            yield sqlite_dtypes(batch.to_pandas())
+    finally:
+        source.close()
+
+
+# Salin tabel summary ke parquet (satu file per tabel) supaya load_* bisa
+# dilayani DuckDB tanpa SQLite. Tiap export ditulis ke direktori versi baru
+# (<directory>/v<ns>/); reader belum melihatnya sampai publish_export.
+def export_tables(db_path, tables, directory=SUMMARY_PARQUET_DIR):
+    version = f"v{time.time_ns()}"
+    target = os.path.join(directory, version)
+    os.makedirs(target)
+    conn = sqlite3.connect(db_path)
+    try:
+        for table in tables:
+            columns = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            types = {name: _arrow_type(decl) for _, name, decl, *_ in columns}
+            cursor = conn.execute(f'SELECT * FROM "{table}"')
+            rows = cursor.fetchall()
+            arrays = {
+                name: pa.array([row[i] for row in rows], type=types[name])
+                for i, name in enumerate(types)
+            }
+            pq.write_table(pa.table(arrays), os.path.join(target, f"{table}.parquet"))
+    finally:
+        conn.close()
+    return version
+
+
+# File EXPORT_POINTER berisi versi export yang dilayani dan diganti atomik
+# (os.replace), jadi reader DuckDB selalu melihat satu export utuh, tidak
+# pernah campuran tabel lama dan baru. Versi sebelumnya disimpan untuk reader
+# yang masih memakainya; sisanya (termasuk export build yang gagal) dihapus.
+EXPORT_POINTER = 'CURRENT'
+
+
+def publish_export(version, directory=SUMMARY_PARQUET_DIR):
+    pointer = os.path.join(directory, EXPORT_POINTER)
+    previous = _published_version(directory)
+    tmp = f"{pointer}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, pointer)
+    for entry in os.scandir(directory):
+        if entry.is_dir() and entry.name.startswith('v') and entry.name not in (version, previous):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        # Export datar lama (sebelum ada versi); disimpan selama masih jadi versi sebelumnya
+        elif previous is not None and entry.is_file() and entry.name.endswith('.parquet'):
+            os.remove(entry.path)
+
+
+def _published_version(directory):
+    try:
+        with open(os.path.join(directory, EXPORT_POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# Direktori parquet yang sedang dilayani (export datar lama kalau belum ada pointer)
+def export_path(directory=SUMMARY_PARQUET_DIR):
+    version = _published_version(directory)
+    return os.path.join(directory, version) if version else directory
+
+
+def _arrow_type(declared):
+    declared = (declared or '').upper()
+    if 'INT' in declared:
+        return pa.int64()
+    if 'REAL' in declared or 'FLOA' in declared or 'DOUB' in declared or 'NUM' in declared:
+        return pa.float64()
+    if 'BLOB' in declared:
+        return pa.binary()
+    return None  # biarkan pyarrow menebak (TEXT, TIMESTAMP, tanpa tipe)
+
+
+def _export_version(directory):
+    return tuple(sorted(
+        (entry.name, entry.stat().st_mtime_ns) for entry in os.scandir(directory)
+        if entry.name.endswith('.parquet')
+    ))
+
+
+# Koneksi DuckDB untuk melayani load_*: satu view per file parquet hasil export.
+# Dibuat ulang kalau export berubah; tiap pemakai dapat cursor sendiri.
+# version: layani export tertentu (mis. cek parity sebelum publish), bukan
+# yang sedang di-publish
+def serving_connection(directory=SUMMARY_PARQUET_DIR, version=None):
+    require_duckdb()
+    path = os.path.join(directory, version) if version else export_path(directory)
+    key = (directory, path, _export_version(path))
+    with _lock:
+        if key not in _serving:
+            for old in [old for old in _serving if old[0] == directory]:
+                _serving.pop(old).close()
+            conn = duckdb.connect()
+            for name, _ in key[2]:
+                file = os.path.abspath(os.path.join(path, name)).replace("'", "''")
+                conn.execute(f"CREATE VIEW {name[:-len('.parquet')]} AS SELECT * FROM read_parquet('{file}')")
+            _serving[key] = conn
+        return _serving[key].cursor()
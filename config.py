@@ -0,0 +1,75 @@
+import os
+
+# Semua setting yang bisa diatur lewat environment variable ada di sini
+
+# App menolak build sendiri kalau jobs_skills.db belum dibuild lewat build_db.py
+REQUIRE_PREBUILT_DB = bool(os.environ.get('JOBS_REQUIRE_PREBUILT_DB'))
+
+# Direktori lokal atau URL file:// berisi salinan ketiga parquet. Kalau diset,
+# source diambil dari sini dan tidak pernah menyentuh network (build offline / test)
+DATA_MIRROR = os.environ.get('JOBS_DATA_MIRROR')
+
+# Size dan sha256 yang di-pin untuk tiap parquet (dibuat dengan build_db.py --pin-sources)
+SOURCE_LOCK_PATH = os.environ.get('JOBS_SOURCE_LOCK', 'sources.lock.json')
+# Tanpa pin hanya header/footer parquet yang dicek (ada peringatan). Diset:
+# parquet tanpa pin ditolak, jadi size dan sha256 selalu diverifikasi
+REQUIRE_SOURCE_PINS = bool(os.environ.get('JOBS_REQUIRE_SOURCE_PINS'))
+
+# Jumlah job_title unik di Top Skills: 'exact' (COUNT DISTINCT di SQLite, sama
+# dengan hasil materialized) atau 'sketch' (HyperLogLog, opt-in: cepat untuk
+# filter apa pun tapi bisa meleset, lihat sketch_errors di build report)
+DISTINCT_COUNTS = os.environ.get('JOBS_DISTINCT_COUNTS', 'exact')
+
+# Backend filter Top Skills / Demand Skills / Salary: 'materialized' (hasil
+# semua kombinasi filter dihitung exact saat build, runtime cukup lookup; yang
+# tidak ada, mis. multi-select, jatuh ke 'sql'), 'sql' (summary di SQLite) atau
+# 'bitmap' (index bitset di memori, exact, dibangun sekali per proses)
+FILTER_BACKEND = os.environ.get('JOBS_FILTER_BACKEND', 'materialized')
+
+# Engine untuk query summary saat build: 'sqlite' atau 'duckdb' (kolumnar,
+# langsung atas file parquet; butuh package duckdb)
+BUILD_ENGINE = os.environ.get('JOBS_BUILD_ENGINE', 'sqlite')
+
+# Jumlah proses worker untuk build summary (lihat build_db.build_summaries).
+# Summary yang tidak saling bergantung dibuild paralel, masing-masing di DB
+# staging sendiri lalu digabung; 1 = berurutan langsung di DB build. Default 1:
+# di data kecil start proses + merge staging lebih mahal dari yang dihemat
+# (build sintetis 20k baris: 8.4s paralel vs 4.8s berurutan).
+BUILD_WORKERS = int(os.environ.get('JOBS_BUILD_WORKERS', 1))
+
+# Engine untuk load_* di dashboard: 'sqlite' (jobs_skills.db) atau 'duckdb'
+# (tabel summary yang di-export ke parquet di SUMMARY_PARQUET_DIR)
+QUERY_ENGINE = os.environ.get('JOBS_QUERY_ENGINE', 'sqlite')
+SUMMARY_PARQUET_DIR = os.environ.get('JOBS_SUMMARY_PARQUET_DIR', 'summary_parquet')
+
+# Tracing (lihat tracing.py). TRACE_PATH: tiap span ditambahkan ke file ini
+# sebagai JSON lines; METRICS_PATH: total per span dalam format Prometheus,
+# ditulis ulang tiap rerun / akhir build; METRICS_PORT: endpoint HTTP /metrics;
+# TRACE_SIDEBAR: tampilkan span terakhir di sidebar (untuk developer)
+TRACE_PATH = os.environ.get('JOBS_TRACE_FILE')
+METRICS_PATH = os.environ.get('JOBS_METRICS_FILE')
+METRICS_PORT = os.environ.get('JOBS_METRICS_PORT')
+TRACE_SIDEBAR = bool(os.environ.get('JOBS_TRACE_SIDEBAR'))
+TRACE_BUFFER_SIZE = int(os.environ.get('JOBS_TRACE_BUFFER_SIZE', 2000))
+
+# Jumlah figure Plotly yang di-cache per fungsi figure (satu per kombinasi filter)
+FIGURE_CACHE_SIZE = int(os.environ.get('JOBS_FIGURE_CACHE_SIZE', 256))
+
+# Warmer cache di background (lihat warmup.py), opt-in. Dimulai sekali per
+# proses saat script pertama kali jalan: view default dulu, lalu kombinasi
+# filter paling umum, berhenti kalau WARMUP_SECONDS (wall) atau
+# WARMUP_CPU_SECONDS (CPU thread warmer) habis. WARMUP_STATUS_PATH: progress
+# dan coverage sebagai JSON, ditulis ulang tiap langkah (untuk readiness probe)
+WARMUP = bool(os.environ.get('JOBS_WARMUP'))
+WARMUP_WORKERS = int(os.environ.get('JOBS_WARMUP_WORKERS', 2))
+WARMUP_SECONDS = float(os.environ.get('JOBS_WARMUP_SECONDS', 120))
+WARMUP_CPU_SECONDS = float(os.environ.get('JOBS_WARMUP_CPU_SECONDS', 60))
+WARMUP_STATUS_PATH = os.environ.get('JOBS_WARMUP_STATUS_FILE')
+
+# Cache hasil load_* di disk (lihat result_cache.py), dipakai bersama semua
+# proses Streamlit di host yang sama. Kosong = mati. Key = fungsi + argumen +
+# versi build DB. Entri dibuang kalau lebih tua dari RESULT_CACHE_TTL detik,
+# atau yang paling lama tidak dipakai kalau total payload > RESULT_CACHE_MAX_MB.
+RESULT_CACHE_PATH = os.environ.get('JOBS_RESULT_CACHE')
+RESULT_CACHE_MAX_MB = float(os.environ.get('JOBS_RESULT_CACHE_MAX_MB', 256))
+RESULT_CACHE_TTL = float(os.environ.get('JOBS_RESULT_CACHE_TTL', 24 * 3600))
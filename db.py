@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from columnar import attach_build_source, serving_connection, sqlite_dtypes
+from config import QUERY_ENGINE
+from tracing import span
+
+DB_PATH = 'jobs_skills.db'
+
+POOL_MAX_SIZE = 8
+MMAP_SIZE = 512 * 1024 * 1024
+CACHE_KIB = 64 * 1024
+
+# Pool koneksi read-only yang dipakai semua load_* di preprocess_*. Koneksi
+# dipinjam per thread selama satu query lalu dikembalikan, jadi page cache
+# SQLite tetap hangat antar rerun Streamlit. Sengaja bukan threading.local:
+# Streamlit menjalankan tiap rerun di thread baru, jadi koneksi per thread
+# tidak pernah dipakai ulang dan baru tertutup saat thread-nya di-GC.
+_cond = threading.Condition()
+_idle = {}       # {(db_path, generation): [conn, ...]}
+_in_use = {}     # {db_path: jumlah koneksi yang sedang dipinjam}
+_stats = {'opens': 0, 'reuses': 0, 'closes': 0, 'waits': 0, 'wait_ms': 0.0}
+
+
+# Berubah kalau file DB diganti / dibuild ulang, supaya koneksi lama
+# (immutable) tidak dipakai lagi
+def db_generation(db_path=DB_PATH):
+    stat = os.stat(db_path)
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+# Versi isi build: digest manifest (versi source + versi summary), tanpa waktu
+# build / mtime. Sama untuk salinan DB yang sama di proses / replica mana pun,
+# berubah kalau ada tabel yang dibuild ulang. Di-memo per generation file.
+_build_versions = {}  # {db_path: (generation, version)}
+
+
+def build_version(db_path=DB_PATH):
+    generation = db_generation(db_path)
+    cached = _build_versions.get(db_path)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    try:
+        rows = read_sql(
+            "SELECT kind, name, version, inputs FROM build_manifest ORDER BY kind, name",
+            db_path=db_path, engine='sqlite',
+        ).values.tolist()
+    except pd.errors.DatabaseError:
+        # DB tanpa manifest: pakai identitas file
+        rows = list(generation)
+    version = hashlib.sha256(json.dumps(rows).encode()).hexdigest()[:16]
+    _build_versions[db_path] = (generation, version)
+    return version
+
+
+def _open(db_path):
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+    return attach_build_source(conn, db_path)
+
+
+def _drop_old_generations(db_path, generation):
+    for key in [key for key in _idle if key[0] == db_path and key[1] != generation]:
+        for conn in _idle.pop(key):
+            conn.close()
+            _stats['closes'] += 1
+
+
+def _acquire(db_path, generation):
+    started = time.perf_counter()
+    with _cond:
+        _drop_old_generations(db_path, generation)
+        waited = False
+        while True:
+            # Dibaca ulang tiap bangun: selama menunggu, thread lain bisa
+            # membuang list ini (_drop_old_generations) atau mengisinya lagi
+            idle = _idle.get((db_path, generation))
+            if idle or _in_use.get(db_path, 0) < POOL_MAX_SIZE:
+                break
+            if not waited:
+                _stats['waits'] += 1
+                waited = True
+            _cond.wait()
+        _in_use[db_path] = _in_use.get(db_path, 0) + 1
+        _stats['wait_ms'] += (time.perf_counter() - started) * 1000
+        if idle:
+            _stats['reuses'] += 1
+            return idle.pop()
+        _stats['opens'] += 1
+    try:
+        return _open(db_path)
+    except Exception:
+        with _cond:
+            _in_use[db_path] -= 1
+            _cond.notify()
+        raise
+
+
+def _release(db_path, generation, conn):
+    with _cond:
+        _in_use[db_path] -= 1
+        if os.path.exists(db_path) and db_generation(db_path) == generation:
+            _idle.setdefault((db_path, generation), []).append(conn)
+        else:
+            conn.close()
+            _stats['closes'] += 1
+        _cond.notify()
+
+
+# engine 'duckdb': cursor DuckDB atas export parquet (lihat columnar), bukan pool SQLite
+@contextmanager
+def connection(db_path=DB_PATH, engine=QUERY_ENGINE):
+    if engine == 'duckdb':
+        cursor = serving_connection()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+        return
+    generation = db_generation(db_path)
+    conn = _acquire(db_path, generation)
+    try:
+        yield conn
+    finally:
+        _release(db_path, generation, conn)
+
+
+def query(conn, sql, params=()):
+    engine = 'sqlite' if isinstance(conn, sqlite3.Connection) else 'duckdb'
+    with span('query', engine, sql=" ".join(sql.split()), params=list(params)) as record:
+        if engine == 'sqlite':
+            df = pd.read_sql_query(sql, conn, params=params)
+        else:
+            df = sqlite_dtypes(conn.execute(sql, list(params)).df())
+        record['attrs']['rows'] = len(df)
+        return df
+
+
+
+def read_sql(sql, params=(), db_path=DB_PATH, engine=QUERY_ENGINE):
+    with connection(db_path, engine) as conn:
+        return query(conn, sql, params)
+
+
+def pool_stats():
+    with _cond:
+        return {
+            **_stats,
+            'wait_ms': round(_stats['wait_ms'], 3),
+            'idle': sum(len(conns) for conns in _idle.values()),
+            'in_use': sum(_in_use.values()),
+        }
+
+
+def close_all():
+    with _cond:
+        for conns in _idle.values():
+            for conn in conns:
+                conn.close()
+                _stats['closes'] += 1
+        _idle.clear()
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from columnar import run_query, serving_connection
+from db import DB_PATH, query, read_sql
+from indexes import dashboard_queries
+from preprocess_dimensions import DIMENSION_TABLES, dimension_queries
+from preprocess_fact import fact_scan_queries
+from preprocess_posting_skill import posting_skill_queries
+
+# Cek SQLite vs DuckDB: (1) tiap SELECT summary di build, dijalankan atas tabel
+# hasil ingest vs langsung atas parquet; (2) tiap query dashboard (load_*), atas
+# jobs_skills.db vs export parquet. Hasil harus sama persis kecuali pembulatan
+# float (urutan penjumlahan AVG bisa beda di tiap engine).
+SUMMARY_QUERIES = [
+    dimension_queries, fact_scan_queries, posting_skill_queries,
+]
+
+
+def _normalize(df, sort):
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype == object:
+            # BLOB: bytes di SQLite, bytearray di DuckDB
+            df[column] = df[column].map(lambda v: bytes(v) if isinstance(v, (bytes, bytearray)) else v)
+    if sort:
+        # Tanpa ORDER BY urutan baris bebas, jadi bandingkan sebagai multiset
+        df = df.sort_values(list(df.columns), na_position='first', kind='stable')
+    return df.reset_index(drop=True)
+
+
+def _compare(label, expected, actual, sort=False):
+    try:
+        pd.testing.assert_frame_equal(
+            _normalize(expected, sort), _normalize(actual, sort),
+            check_exact=False, rtol=1e-9,
+        )
+    except AssertionError as e:
+        return {'query': label, 'problem': str(e).strip().splitlines()[0]}
+    return None
+
+
+def build_parity(db_path=DB_PATH):
+    problems = []
+    for summary_queries in SUMMARY_QUERIES:
+        sqlite_queries = summary_queries('sqlite')
+        duckdb_queries = summary_queries('duckdb')
+        for (table, sqlite_sql, params), (_, duckdb_sql, _) in zip(sqlite_queries, duckdb_queries):
+            expected = run_query(db_path, sqlite_sql, params, 'sqlite')
+            actual = run_query(db_path, duckdb_sql, params, 'duckdb', sqlite_tables=DIMENSION_TABLES)
+            problems.append(_compare(f"build {table}", expected, actual, sort=True))
+    return [problem for problem in problems if problem]
+
+
+# Butuh export parquet (build_db.py --export-parquet). version: export yang
+# belum di-publish (lihat columnar.publish_export), default yang sedang dilayani
+def serving_parity(db_path=DB_PATH, version=None):
+    problems = []
+    cursor = serving_connection(version=version)
+    try:
+        for label, sql, params in dashboard_queries():
+            expected = read_sql(sql, params, db_path=db_path, engine='sqlite')
+            actual = query(cursor, sql, params)
+            problems.append(_compare(label, expected, actual))
+    finally:
+        cursor.close()
+    return [problem for problem in problems if problem]
@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Geocoding offline job_location -> koordinat dari gazetteer.csv yang dibundel
+# (negara, provinsi/state dengan kodenya, kota besar), tanpa API / jaringan.
+# Semua lookup berupa merge pandas atas lokasi unik, jadi biayanya ikut jumlah
+# lokasi unik, bukan jumlah posting.
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.csv')
+
+# Urutan presisi: lokasi yang lebih spesifik menang. 'job_country' = job_location
+# tidak dikenali (mis. "Anywhere"), pakai centroid job_country.
+PRECISIONS = ['city', 'admin', 'country', 'job_country']
+
+_HIT_COLUMNS = ['place', 'lat', 'lon']
+
+
+def _normalize(values):
+    return values.fillna('').astype(str).str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+# Satu baris per nama / alias: key (dinormalisasi), kind, country, place (label
+# untuk tooltip), lat, lon
+def load_gazetteer(path=GAZETTEER_PATH):
+    gazetteer = pd.read_csv(path, keep_default_na=False)
+    gazetteer['place'] = np.where(
+        (gazetteer['kind'] == 'country') | (gazetteer['name'] == gazetteer['country']),
+        gazetteer['name'], gazetteer['name'] + ', ' + gazetteer['country'],
+    )
+    keys = gazetteer.assign(key=(gazetteer['name'] + '|' + gazetteer['aliases']).str.split('|')).explode('key')
+    keys = keys[keys['key'] != '']
+    keys['key'] = _normalize(keys['key'])
+    return keys[['key', 'kind', 'country', 'place', 'lat', 'lon']].reset_index(drop=True)
+
+
+def _lookup(table, on, **columns):
+    frame = pd.DataFrame({name: values.to_numpy() for name, values in columns.items()})
+    hit = frame.merge(table[[*on, *_HIT_COLUMNS]], on=on, how='left')
+    hit.index = next(iter(columns.values())).index
+    return hit
+
+
+# locations: DataFrame dengan kolom job_location dan job_country (kolom lain
+# ikut dikembalikan). Hasil: + place, precision (lihat PRECISIONS, None kalau
+# tidak dikenali sama sekali), lat, lon.
+# job_location dipecah per koma: token pertama = kota, token terakhir = negara
+# atau kode state ("New York, NY", "London, UK", "Bengaluru, Karnataka, India").
+def geocode(locations, gazetteer=None):
+    keys = load_gazetteer() if gazetteer is None else gazetteer
+    countries = keys[keys['kind'] == 'country']
+    admins = keys[keys['kind'] == 'admin'].drop_duplicates(['key', 'country'])
+    cities = keys[keys['kind'] == 'city'].drop_duplicates(['key', 'country'])
+
+    parts = _normalize(locations['job_location']).str.split(',')
+    head = parts.str[0].str.strip()
+    tail = parts.str[-1].str.strip()
+    region = parts.str[-2].astype(object).where(parts.str.len() >= 3, tail).str.strip()
+
+    # Negara dari token terakhir (nama / alias negara, atau nama / kode state)
+    country_of_key = countries.drop_duplicates('key').set_index('key')['country']
+    admin_country = admins.drop_duplicates('key').set_index('key')['country']
+    country = tail.map(country_of_key).fillna(tail.map(admin_country))
+    fallback = _normalize(locations['job_country']).map(country_of_key)
+    context = country.fillna(fallback)
+
+    city = _lookup(cities, ['key', 'country'], key=head, country=context)
+    # Nama kota tanpa konteks negara sama sekali: hanya kalau namanya unik
+    unique_cities = cities[~cities['key'].duplicated(keep=False)]
+    city_any = _lookup(unique_cities, ['key'], key=head.where(context.isna()))
+    city = city.fillna(city_any[_HIT_COLUMNS])
+
+    admin = _lookup(admins, ['key', 'country'], key=region, country=context)
+    country_rows = countries.drop_duplicates('country')
+    country_hit = _lookup(country_rows, ['country'], country=country)
+    fallback_hit = _lookup(country_rows, ['country'], country=fallback)
+
+    result = locations.copy()
+    result['place'] = None
+    result['precision'] = None
+    result['lat'] = np.nan
+    result['lon'] = np.nan
+    for precision, hit in zip(PRECISIONS, (city, admin, country_hit, fallback_hit)):
+        fill = result['precision'].isna().to_numpy() & hit['lat'].notna().to_numpy()
+        result.loc[fill, _HIT_COLUMNS] = hit.loc[fill, _HIT_COLUMNS].to_numpy()
+        result.loc[fill, 'precision'] = precision
+    result['lat'] = result['lat'].astype('float64')
+    result['lon'] = result['lon'].astype('float64')
+    return result
+
+
+# Agregasi titik (lat, lon, weight) ke sel grid cell_deg x cell_deg derajat.
+# Posisi sel = centroid berbobot titik di dalamnya (bukan tengah sel), label =
+# place dengan bobot terbesar.
+def grid_bins(points, cell_deg, weight='job_count'):
+    points = points.dropna(subset=['lat', 'lon'])
+    points = points.groupby(['place', 'lat', 'lon'], as_index=False)[weight].sum()
+    points['lat_bin'] = np.floor((points['lat'] + 90) / cell_deg).astype('int64')
+    points['lon_bin'] = np.floor((points['lon'] + 180) / cell_deg).astype('int64')
+    points['lat_w'] = points['lat'] * points[weight]
+    points['lon_w'] = points['lon'] * points[weight]
+
+    cells = points.groupby(['lat_bin', 'lon_bin'])
+    bins = cells.agg(
+        lat_w=('lat_w', 'sum'), lon_w=('lon_w', 'sum'), job_count=(weight, 'sum'), places=('place', 'nunique'),
+    )
+    bins['lat'] = bins.pop('lat_w') / bins['job_count']
+    bins['lon'] = bins.pop('lon_w') / bins['job_count']
+    top = points.sort_values(weight, ascending=False, kind='stable').drop_duplicates(['lat_bin', 'lon_bin'])
+    bins['place'] = top.set_index(['lat_bin', 'lon_bin'])['place']
+    return bins.reset_index()[['lat_bin', 'lon_bin', 'lat', 'lon', 'job_count', 'place', 'places']]
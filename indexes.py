@@ -0,0 +1,125 @@
+from preprocess_top_skills import TOP_N, top_skills_queries, top_skills_sketch_query
+from preprocess_demand_skills import demand_skills_query
+from preprocess_salary import salary_sketch_query
+from result_store import RESULT_TABLE, result_key
+
+# (nama index, tabel, kolom). Dibuat dengan CREATE INDEX IF NOT EXISTS, jadi
+# aman dijalankan di setiap build.
+
+# Dipakai join di create_posting_skill_fact. Dibuat setelah ingest, sebelum summary.
+BASE_INDEXES = [
+    ('idx_job_postings_fact_job_id', 'job_postings_fact', ['job_id']),
+    ('idx_skills_job_dim_job_skill', 'skills_job_dim', ['job_id', 'skill_id']),
+    ('idx_skills_dim_skill_id', 'skills_dim', ['skill_id']),
+]
+
+# Covering index sesuai bentuk WHERE / GROUP BY tiap load_*
+SUMMARY_INDEXES = [
+    # load_top_skills_summary: filter job_title_short dan/atau skill type,
+    # GROUP BY skill_id, COUNT(DISTINCT job_title_id)
+    ('idx_jtsc_title_type_skill', 'job_title_skill_count',
+     ['job_title_short_id', 'skill_type_id', 'skill_id', 'job_title_id']),
+    ('idx_jtsc_type_skill', 'job_title_skill_count',
+     ['skill_type_id', 'skill_id', 'job_title_id']),
+    # load_top_skills_summary dengan sketch: sel per filter, urut skill_id
+    ('idx_sketch_title_type_skill', 'job_title_sketch',
+     ['job_title_short_id', 'skill_type_id', 'skill_id']),
+    # load_demand_skills: title dan schedule selalu terisi (ALL_ID untuk "semua")
+    ('idx_demand_totals_filter', 'demand_skill_totals',
+     ['job_title_short_id', 'schedule_type_id', 'job_title_count', 'skill_id']),
+    ('idx_demand_cube_filter', 'demand_skill_cube',
+     ['job_title_short_id', 'schedule_type_id', 'skill_id', 'posted_day', 'job_title_count']),
+    # load_salary_summary(month)
+    ('idx_salary_summary_month', 'salary_summary', ['month']),
+    # load_salary_histogram(month)
+    ('idx_salary_histogram_month', 'salary_histogram', ['month', 'job_title_short', 'salary_bin', 'count']),
+    # load_salary_quantiles(month): sketch per job title di bulan itu
+    ('idx_salary_sketch_month', 'salary_sketch', ['month', 'job_title_short']),
+    # load_job_location_grid(zoom): sel grid satu resolusi map
+    ('idx_job_location_grid_zoom', 'job_location_grid', ['zoom', 'job_count']),
+    # Query ad-hoc atas posting_skill_fact: posting per skill (skill per posting
+    # cukup lewat idx_skills_job_dim_job_skill)
+    ('idx_posting_skill_fact_skill', 'posting_skill_fact', ['skill_id', 'job_id']),
+]
+
+# Summary kecil yang memang selalu dibaca utuh oleh dashboard
+WHOLE_TABLE_READS = {
+    'top_job_title_summary', 'skill_type_distribution_summary',
+    'job_country_summary', 'job_summary_stats', 'salary_summary', 'salary_histogram', 'salary_sketch',
+    # tanpa filter, semua sel sketch memang di-merge
+    'job_title_sketch',
+}
+
+# Query tanpa filter yang memang harus membaca semua baris tabel besar
+# (COUNT(DISTINCT ..) atas seluruh tabel): (label query, tabel)
+WHOLE_TABLE_QUERIES = {
+    ('load_top_skills_summary(None, None) total', 'job_title_skill_count'),
+    ('load_top_skills_summary(None, None) top', 'job_title_skill_count'),
+}
+
+
+def create_indexes(conn, indexes):
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    created = []
+    for name, table, columns in indexes:
+        if name not in existing:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({", ".join(columns)})')
+            created.append(name)
+    conn.commit()
+    return created
+
+
+def dashboard_queries():
+    queries = [
+        ('load_top_job_title_summary', "SELECT * FROM top_job_title_summary", []),
+        ('load_skill_type_distribution', "SELECT * FROM skill_type_distribution_summary", []),
+        ('load_job_country', "SELECT * FROM job_country_summary", []),
+        ('load_job_location_grid(zoom)',
+         "SELECT lat, lon, job_count, place, places FROM job_location_grid WHERE zoom = ? ORDER BY job_count DESC", [1]),
+        ('load_job_summary_stats', "SELECT * FROM job_summary_stats", []),
+        ('load_salary_summary()', "SELECT * FROM salary_summary", []),
+        ('load_salary_summary(month)', "SELECT * FROM salary_summary WHERE month = ?", [1]),
+        ('load_salary_histogram()', "SELECT * FROM salary_histogram", []),
+        ('load_salary_histogram(month)', "SELECT * FROM salary_histogram WHERE month = ?", [1]),
+    ]
+    for month, title in ((None, None), (1, None), (None, 'Data Analyst')):
+        sql, params = salary_sketch_query(month, title)
+        queries.append((f"load_salary_quantiles({month!r}, {title!r})", sql, params))
+    for title in (None, 'Data Analyst'):
+        for skill_type in (None, 'programming'):
+            total_sql, top_sql, params = top_skills_queries(title, skill_type)
+            label = f"load_top_skills_summary({title!r}, {skill_type!r})"
+            queries.append((label + ' total', total_sql, params))
+            queries.append((label + ' top', top_sql, params))
+            sketch_sql, params = top_skills_sketch_query(title, skill_type)
+            queries.append((label + ' sketch', sketch_sql, params))
+    for title in (None, 'Data Analyst'):
+        for schedule in (None, 'Full-time'):
+            sql, params = demand_skills_query(title, schedule)
+            queries.append((f"load_demand_skills({title!r}, {schedule!r})", sql, params))
+    # backend 'materialized': lookup primary key
+    queries.append(('lookup_result', f"SELECT payload FROM {RESULT_TABLE} WHERE view = ? AND key = ?",
+                    ['top_skills', result_key(None, None, TOP_N)]))
+    return queries
+
+
+# Cek EXPLAIN QUERY PLAN: tidak boleh ada SCAN tabel atau automatic index,
+# kecuali summary kecil di WHOLE_TABLE_READS dan pasangan di WHOLE_TABLE_QUERIES.
+# SCAN lewat covering index tetap membaca semua baris, jadi ikut dihitung;
+# yang lolos hanya SEARCH dan SCAN atas subquery (derived table).
+def verify_query_plans(conn):
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    problems = []
+    for label, sql, params in dashboard_queries():
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+            detail = row[-1]
+            words = detail.split()
+            full_scan = (
+                words[0] == 'SCAN'
+                and words[1] in tables
+                and words[1] not in WHOLE_TABLE_READS
+                and (label, words[1]) not in WHOLE_TABLE_QUERIES
+            )
+            if full_scan or 'AUTOMATIC' in detail:
+                problems.append({'query': label, 'plan': detail})
+    return problems
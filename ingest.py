@@ -0,0 +1,108 @@
+import sqlite3
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from load_data import open_parquet
+from tracing import span
+
+INGEST_BATCH_SIZE = 50_000
+INGEST_CACHE_KIB = 256 * 1024
+
+# PRAGMA khusus saat ingest: DB dibuat ulang dari parquet kalau gagal, jadi
+# journal dan fsync tidak dibutuhkan.
+INGEST_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    f"PRAGMA cache_size = -{INGEST_CACHE_KIB}",
+    "PRAGMA temp_store = MEMORY",
+]
+DEFAULT_PRAGMAS = [
+    "PRAGMA journal_mode = DELETE",
+    "PRAGMA synchronous = FULL",
+]
+
+
+# Tipe kolom sama dengan yang dipakai DataFrame.to_sql sebelumnya
+def sqlite_type(arrow_type):
+    if pa.types.is_dictionary(arrow_type):
+        return sqlite_type(arrow_type.value_type)
+    if pa.types.is_boolean(arrow_type) or pa.types.is_integer(arrow_type):
+        return 'INTEGER'
+    if pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return 'REAL'
+    if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+        return 'TIMESTAMP'
+    return 'TEXT'
+
+
+# Timestamp disimpan sebagai teks 'YYYY-MM-DD HH:MM:SS' supaya DATE()/strftime()
+# di query summary tetap jalan
+def to_sqlite_values(column):
+    if pa.types.is_dictionary(column.type):
+        column = column.dictionary_decode()
+    if pa.types.is_timestamp(column.type):
+        # Cast ke detik dulu, kalau tidak %S ikut menulis pecahan detik
+        seconds = pa.timestamp('s', tz=column.type.tz)
+        column = pc.strftime(column.cast(seconds, safe=False), format='%Y-%m-%d %H:%M:%S')
+    elif pa.types.is_date(column.type):
+        column = column.cast(pa.string())
+    elif pa.types.is_decimal(column.type):
+        # Kolom REAL; sqlite3 tidak bisa bind decimal.Decimal
+        column = column.cast(pa.float64(), safe=False)
+    elif sqlite_type(column.type) == 'TEXT' and not (
+        pa.types.is_string(column.type) or pa.types.is_large_string(column.type)
+    ):
+        column = column.cast(pa.string())
+    return column.to_pylist()
+
+
+def ingest_parquet(conn, parquet, table, batch_size=INGEST_BATCH_SIZE):
+    schema = parquet.schema_arrow
+    columns = ", ".join(f'"{field.name}" {sqlite_type(field.type)}' for field in schema)
+    placeholders = ", ".join("?" for _ in schema)
+    insert_sql = f'INSERT INTO "{table}" VALUES ({placeholders})'
+
+    started = time.perf_counter()
+    rows = 0
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(f'CREATE TABLE "{table}" ({columns})')
+        # Memori dibatasi ukuran batch, bukan ukuran tabel
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            values = [to_sqlite_values(column) for column in batch.columns]
+            conn.executemany(insert_sql, zip(*values))
+            rows += batch.num_rows
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    seconds = time.perf_counter() - started
+    return {
+        'table': table,
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds) if seconds else None,
+    }
+
+
+def ingest_parquet_files(db_path, sources, batch_size=INGEST_BATCH_SIZE):
+    # sources = {nama file parquet: nama tabel}
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        for pragma in INGEST_PRAGMAS:
+            conn.execute(pragma)
+        stats = []
+        for filename, table in sources.items():
+            with span('build', f"ingest:{table}") as record, open_parquet(filename) as parquet:
+                stats.append(ingest_parquet(conn, parquet, table, batch_size))
+                record['attrs']['rows'] = stats[-1]['rows']
+            print(f"[ingest] {table}: {stats[-1]['rows']:,} rows, {stats[-1]['rows_per_sec'] or 0:,} rows/s")
+        for pragma in DEFAULT_PRAGMAS:
+            conn.execute(pragma)
+        return stats
+    finally:
+        conn.close()
@@ -1,7 +1,18 @@
-import pandas as pd
+import contextvars
 import gdown
+import json
 import os
-import streamlit as st
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import pyarrow.parquet as pq
+
+from build_manifest import file_sha256
+from config import DATA_MIRROR, REQUIRE_SOURCE_PINS, SOURCE_LOCK_PATH
+from tracing import span
 
 files = {
     'job_postings_fact.parquet': '19I6zhi6y-ETs2A25RfAZbxNjcWz6RhOO',
@@ -9,15 +20,121 @@ files = {
     'skills_job_dim.parquet': '1ZVSyFBSLQJzv8n6oqERhpOHY2j2gVlWs'
 }
 
-@st.cache_data(show_spinner=False)
-def download_and_load_parquet():
-    dataframes = {}
-    for filename, file_id in files.items():
-        url = f'https://drive.google.com/uc?id={file_id}'
+PARQUET_MAGIC = b'PAR1'
+COPY_CHUNK_SIZE = 1 << 20
+
+# File yang sudah lolos verifikasi di proses ini: {filename: (size, mtime_ns)}
+_verified = {}
+
+# Source hanya dibutuhkan saat build DB, jadi tidak ada DataFrame yang disimpan
+# di st.cache_data. Yang dibagikan cuma path / handle Arrow, dan ditutup lagi
+# begitu selesai dipakai.
+
+def load_source_pins(lock_path=SOURCE_LOCK_PATH):
+    if not os.path.exists(lock_path):
+        return {}
+    with open(lock_path) as f:
+        return json.load(f)
+
+# File source tanpa pin size/sha256 (hanya header/footer parquet yang dicek);
+# dicatat di build report dan span download
+def unpinned_sources(pins=None):
+    pins = load_source_pins() if pins is None else pins
+    return [filename for filename in files if filename not in pins]
+
+def write_source_pins(lock_path=SOURCE_LOCK_PATH):
+    pins = {}
+    for filename in files:
+        verify_parquet_file(filename, pins={}, require_pin=False)
+        pins[filename] = {'size': os.path.getsize(filename), 'sha256': file_sha256(filename)}
+    with open(lock_path, 'w') as f:
+        json.dump(pins, f, indent=2)
+    return pins
+
+def mirror_dir(mirror=DATA_MIRROR):
+    if mirror and mirror.startswith('file://'):
+        return url2pathname(urlparse(mirror).path)
+    return mirror
+
+# Gagal cepat: file yang terpotong / korup langsung dihapus dan error, supaya
+# tidak pernah diingest jadi summary yang rusak
+def verify_parquet_file(filename, pins=None, require_pin=REQUIRE_SOURCE_PINS):
+    pins = load_source_pins() if pins is None else pins
+    pin = pins.get(filename)
+    size = os.path.getsize(filename)
+    if not pin and require_pin:
+        # File-nya sendiri belum tentu rusak, jadi tidak dihapus
+        raise ValueError(f"{filename}: no size/sha256 pin in {SOURCE_LOCK_PATH} (build_db.py --pin-sources)")
+    problem = None
+    if pin and size != pin['size']:
+        problem = f"size {size} != pinned {pin['size']}"
+    else:
+        with open(filename, 'rb') as f:
+            head = f.read(4)
+            f.seek(max(size - 4, 0))
+            tail = f.read(4)
+        if head != PARQUET_MAGIC or tail != PARQUET_MAGIC:
+            problem = "missing parquet header/footer (incomplete download?)"
+        elif pin and file_sha256(filename) != pin['sha256']:
+            problem = "sha256 does not match pinned hash"
+    if problem:
+        os.remove(filename)
+        raise ValueError(f"{filename}: {problem}")
+
+def copy_from_mirror(filename, mirror):
+    src = os.path.join(mirror, filename)
+    part = filename + '.part'
+    # Lanjutkan copy yang terputus dari posisi terakhir
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    if offset > os.path.getsize(src):
+        offset = 0
+    with open(src, 'rb') as fsrc, open(part, 'r+b' if offset else 'wb') as fdst:
+        fsrc.seek(offset)
+        fdst.seek(offset)
+        shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+    os.replace(part, filename)
+
+def download_parquet_file(filename):
+    with span('download', filename) as record:
+        record['cache'] = 'hit'
         if not os.path.exists(filename):
-            gdown.download(url, filename, quiet=True)
-        df = pd.read_parquet(filename)
-        dataframes[filename] = df
-    return dataframes
+            record['cache'] = 'miss'
+            mirror = mirror_dir()
+            record['attrs']['source'] = 'mirror' if mirror else 'gdrive'
+            if mirror:
+                copy_from_mirror(filename, mirror)
+            else:
+                # gdown menulis ke *.part dan hanya rename kalau sudah lengkap
+                url = f'https://drive.google.com/uc?id={files[filename]}'
+                if gdown.download(url, filename, quiet=True, resume=True) is None:
+                    raise RuntimeError(f"Failed to download {filename} from Google Drive")
+
+        stat = os.stat(filename)
+        pins = load_source_pins()
+        record['attrs']['bytes'] = stat.st_size
+        record['attrs']['pinned'] = filename in pins
+        if _verified.get(filename) != (stat.st_size, stat.st_mtime_ns):
+            verify_parquet_file(filename, pins)
+            if filename not in pins:
+                print(f"[download] warning: {filename} has no pin in {SOURCE_LOCK_PATH}, only the parquet "
+                      f"header/footer was checked (build_db.py --pin-sources, JOBS_REQUIRE_SOURCE_PINS=1)")
+            _verified[filename] = (stat.st_size, stat.st_mtime_ns)
+        return filename
 
+def download_parquet_files():
+    # Ketiga file diambil bersamaan
+    with ThreadPoolExecutor(max_workers=len(files)) as pool:
+        # Konteks disalin supaya span tiap file tercatat di bawah span pemanggil
+        futures = [
+            pool.submit(contextvars.copy_context().run, download_parquet_file, filename)
+            for filename in files
+        ]
+        return [future.result() for future in futures]
 
+@contextmanager
+def open_parquet(filename):
+    parquet = pq.ParquetFile(download_parquet_file(filename))
+    try:
+        yield parquet
+    finally:
+        parquet.close()
@@ -2,13 +2,181 @@ import streamlit as st
 from preprocess_introduction import load_job_country, load_job_summary_stats,load_skill_type_distribution,load_top_job_title_summary
 import plotly.graph_objects as go
 import plotly.express as px
+from config import FIGURE_CACHE_SIZE
+from db import db_generation
+from tracing import plotly_chart, traced, traced_cache_figure
 
-@st.cache_data(show_spinner=False)
+# Mapping label format
+def format_label(option):
+    return {
+        "databases": "Databases",
+        "analyst_tools": "Tools",
+        "programming": "Languages",
+        "webframeworks": "Frameworks",
+        "cloud": "Cloud",
+        "os": "OS",
+        "sync": "Sync",
+        "async": "Async",
+        "other": "Other"
+    }.get(option, option)
+
+
+# Figure dibuat sekali (per versi DB) dan dipakai ulang semua session
+@traced_cache_figure(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def top_jobs_figure(data_version):
+    top_jobs_df = load_top_job_title_summary()
+
+    # Gradasi warna manual
+    gradient_colors = [
+        'rgba(173, 216, 230, 0.9)',  # light blue
+        'rgba(135, 206, 250, 0.9)',
+        'rgba(100, 149, 237, 0.9)',
+        'rgba(70, 130, 180, 0.9)',
+        'rgba(65, 105, 225, 0.9)'   # royal blue
+    ]
+
+    # Buat figure
+    fig = go.Figure()
+
+    for i, row in top_jobs_df.iterrows():
+        fig.add_trace(go.Bar(
+            x=[row['job_title_short']],
+            y=[row['count']],
+            marker=dict(color=gradient_colors[i]),
+            hovertemplate=f"{row['job_title_short']}<br>Count: {row['count']} Jobs<extra></extra>",
+            showlegend=False
+        ))
+
+    fig.update_layout(
+        hoverlabel=dict(
+            bgcolor='#16213e',
+            bordercolor='white',
+            font=dict(color='white', size=20),
+        ),
+        title= dict(
+            text='Top 5 Most In-Demand <br> Data IT Job Roles',
+            x=0.5,
+            xanchor='center',
+            font=dict(size=25, color='white')
+        ),
+        xaxis=dict(
+            title='', 
+            showline=False, 
+            showticklabels=True, 
+            showgrid=False,
+            tickfont=dict(size=20)
+        ),
+        yaxis=dict(
+            visible=False  # Ini matiin semua tampilan sumbu Y
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=20, r=20, t=80, b=40)
+    )
+
+    return fig
+
+
+@traced_cache_figure(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def skill_type_figure(data_version):
+    skill_dist_df = load_skill_type_distribution()
+
+    # Hitung distribusi skill type (tanpa filter)
+    type_distribution = (
+        skill_dist_df.groupby("skill_type")["job_title_count"]
+        .sum()
+        .sort_values(ascending=False)
+    )
+
+
+    # Format labels
+    formatted_labels = [format_label(t) for t in type_distribution.index]
+
+    # Hitung persentase
+    type_percent = (type_distribution / type_distribution.sum() * 100).round(2)
+
+    # Pie Chart
+    fig = go.Figure(data=[go.Pie(
+        labels=formatted_labels,
+        values=type_percent.values,
+        hole=0.45,
+        textinfo='label',
+        showlegend=False,
+        hovertemplate="<b>%{label}</b><br>📊 Required in %{value:.2f}% of postings<extra></extra>",
+        marker=dict(colors=px.colors.qualitative.Set3)
+    )])
+
+    fig.update_layout(
+        title= dict(
+            text='Skill Type Distribution <br> by Percentage',
+            x=0.5,
+            xanchor='center',
+            font=dict(size=25, color='white')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=15),
+        margin=dict(t=40, b=40, l=20, r=70),
+        hoverlabel=dict(
+            bgcolor='#16213e',
+            bordercolor='white',
+            font=dict(color='white', size=20),
+        ),
+        
+        
+    )
+
+    return fig
+
+
+@traced_cache_figure(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def job_locations_figure(data_version):
+    country_df = load_job_country()
+
+    # Hitung jumlah lokasi unik
+    n_locations = country_df['country'].nunique()
+
+    # Hitung jumlah job per country, urut dari terbesar
+    job_counts = country_df.set_index('country')['job_count'].sort_values(ascending=False).head(10)
+
+
+    # Buat bar chart
+    fig = go.Figure(go.Bar(
+        x=job_counts.index,
+        y=job_counts.values,
+        marker_color='royalblue',
+        hovertemplate='%{x}<br>Jobs: %{y}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title= dict(
+            text='🌍 Job Locations',
+            x=0.5,
+            xanchor='center',
+            font=dict(size=25, color='white')
+        ),
+        xaxis_title="",
+        yaxis_title="Number of Jobs",
+        font=dict(color='white', size=18),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(t=40, b=40, l=40, r=40),
+        hoverlabel=dict(
+            bgcolor='#16213e',
+            bordercolor='white',
+            font=dict(color='white', size=20),
+        ),
+        hoverdistance=100
+    )
+
+    return fig
+
+
+@traced('render')
 def introduction_render():
     st.title("💼 IT Job Market Explorer 2023")
     st.markdown("---")
 
-    top_jobs_df = load_top_job_title_summary()
     summary_stats = load_job_summary_stats()
     
 
@@ -21,61 +189,13 @@ def introduction_render():
 
     with col1:
 
-        # Gradasi warna manual
-        gradient_colors = [
-            'rgba(173, 216, 230, 0.9)',  # light blue
-            'rgba(135, 206, 250, 0.9)',
-            'rgba(100, 149, 237, 0.9)',
-            'rgba(70, 130, 180, 0.9)',
-            'rgba(65, 105, 225, 0.9)'   # royal blue
-        ]
-
-        # Buat figure
-        fig = go.Figure()
-
-        for i, row in top_jobs_df.iterrows():
-            fig.add_trace(go.Bar(
-                x=[row['job_title_short']],
-                y=[row['count']],
-                marker=dict(color=gradient_colors[i]),
-                hovertemplate=f"{row['job_title_short']}<br>Count: {row['count']} Jobs<extra></extra>",
-                showlegend=False
-            ))
-
-        fig.update_layout(
-            hoverlabel=dict(
-                bgcolor='#16213e',
-                bordercolor='white',
-                font=dict(color='white', size=20),
-            ),
-            title= dict(
-                text='Top 5 Most In-Demand <br> Data IT Job Roles',
-                x=0.5,
-                xanchor='center',
-                font=dict(size=25, color='white')
-            ),
-            xaxis=dict(
-                title='', 
-                showline=False, 
-                showticklabels=True, 
-                showgrid=False,
-                tickfont=dict(size=20)
-            ),
-            yaxis=dict(
-                visible=False  # Ini matiin semua tampilan sumbu Y
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(l=20, r=20, t=80, b=40)
-        )
-
         # Hapus toolbar dan disable zoom
         config = {
             "displayModeBar": False,
             "scrollZoom": False
         }
 
-        st.plotly_chart(fig, use_container_width=True, config=config)
+        plotly_chart(top_jobs_figure(db_generation()), use_container_width=True, config=config)
 
     with col2:
         st.markdown(f"""
@@ -110,115 +230,17 @@ def introduction_render():
         
 
     col11, col12  = st.columns([1,1])
-    skill_dist_df = load_skill_type_distribution()
-    country_df = load_job_country()
 
 
     with col11:
-        # Mapping label format
-        def format_label(option):
-            return {
-                "databases": "Databases",
-                "analyst_tools": "Tools",
-                "programming": "Languages",
-                "webframeworks": "Frameworks",
-                "cloud": "Cloud",
-                "os": "OS",
-                "sync": "Sync",
-                "async": "Async",
-                "other": "Other"
-            }.get(option, option)
-
-        # Hitung distribusi skill type (tanpa filter)
-        type_distribution = (
-            skill_dist_df.groupby("skill_type")["job_title_count"]
-            .sum()
-            .sort_values(ascending=False)
-        )
-
-
-        # Format labels
-        formatted_labels = [format_label(t) for t in type_distribution.index]
-
-        # Hitung persentase
-        type_percent = (type_distribution / type_distribution.sum() * 100).round(2)
-
-        # Pie Chart
-        fig = go.Figure(data=[go.Pie(
-            labels=formatted_labels,
-            values=type_percent.values,
-            hole=0.45,
-            textinfo='label',
-            showlegend=False,
-            hovertemplate="<b>%{label}</b><br>📊 Required in %{value:.2f}% of postings<extra></extra>",
-            marker=dict(colors=px.colors.qualitative.Set3)
-        )])
-
-        fig.update_layout(
-            title= dict(
-                text='Skill Type Distribution <br> by Percentage',
-                x=0.5,
-                xanchor='center',
-                font=dict(size=25, color='white')
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='white', size=15),
-            margin=dict(t=40, b=40, l=20, r=70),
-            hoverlabel=dict(
-                bgcolor='#16213e',
-                bordercolor='white',
-                font=dict(color='white', size=20),
-            ),
-            
-            
-        )
-
         # Show it
-        st.plotly_chart(fig, use_container_width=True, config={
+        plotly_chart(skill_type_figure(db_generation()), use_container_width=True, config={
             'displayModeBar': False,
             'displaylogo': False
         })
     
     with col12 :
-
-        # Hitung jumlah lokasi unik
-        n_locations = country_df['country'].nunique()
-
-        # Hitung jumlah job per country, urut dari terbesar
-        job_counts = country_df.set_index('country')['job_count'].sort_values(ascending=False).head(10)
-
-
-        # Buat bar chart
-        fig = go.Figure(go.Bar(
-            x=job_counts.index,
-            y=job_counts.values,
-            marker_color='royalblue',
-            hovertemplate='%{x}<br>Jobs: %{y}<extra></extra>'
-        ))
-
-        fig.update_layout(
-            title= dict(
-                text='🌍 Job Locations',
-                x=0.5,
-                xanchor='center',
-                font=dict(size=25, color='white')
-            ),
-            xaxis_title="",
-            yaxis_title="Number of Jobs",
-            font=dict(color='white', size=18),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=40, l=40, r=40),
-            hoverlabel=dict(
-                bgcolor='#16213e',
-                bordercolor='white',
-                font=dict(color='white', size=20),
-            ),
-            hoverdistance=100
-        )
-
-        st.plotly_chart(fig, use_container_width=True, config={
+        plotly_chart(job_locations_figure(db_generation()), use_container_width=True, config={
             'displayModeBar': False,
             'displaylogo': False
         })
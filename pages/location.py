@@ -1,40 +1,49 @@
 import streamlit as st
 import pydeck as pdk
-import pandas as pd
-from preprocess_location import load_job_country_summary
+import numpy as np
+from preprocess_location import GRID_LEVELS, load_job_location_grid
+from config import FIGURE_CACHE_SIZE
+from db import db_generation
+from tracing import traced, traced_cache_data
 
 
-@st.cache_data(show_spinner=False)
-def location_render():
-    st.header("🌍 Job Openings by Country")
-    st.markdown("This map shows the distribution of job vacancies across countries from the dataset.")
+# Resolusi map -> zoom di GRID_LEVELS (sel grid yang sudah dihitung saat build)
+RESOLUTIONS = dict(zip(['World', 'Region', 'City'], GRID_LEVELS))
 
-    country_counts = load_job_country_summary()
 
-    # Koordinat negara (sementara hardcoded)
-    country_coords = pd.DataFrame({
-        'Country': ['United States', 'India', 'Germany', 'United Kingdom', 'Indonesia',
-                    'Canada', 'Australia', 'France', 'Brazil', 'Japan'],
-        'lat': [37.0902, 20.5937, 51.1657, 55.3781, -0.7893,
-                56.1304, -25.2744, 46.2276, -14.2350, 36.2048],
-        'lon': [-95.7129, 78.9629, 10.4515, -3.4360, 113.9213,
-                -106.3468, 133.7751, 2.2137, -51.9253, 138.2529]
-    })
+# Data layer dihitung sekali per resolusi (dan versi DB). Yang di-cache data,
+# bukan pdk.Deck: Deck bisa diubah pemanggilnya, jadi tiap session membuat
+# Deck sendiri di job_map_deck (murah, tanpa query).
+@traced_cache_data('figure', show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def job_map_data(zoom, data_version):
+    map_data = load_job_location_grid(zoom).copy()
 
-    # Gabungkan koordinat
-    map_data = pd.merge(country_counts, country_coords, left_on='country', right_on='Country', how='left')
-    map_data.dropna(subset=['lat', 'lon'], inplace=True)
+    # Radius bubble: luas ~ jumlah posting, maksimal setengah sel grid
+    cell_meters = GRID_LEVELS[zoom] * 111_000
+    map_data['radius'] = np.sqrt(map_data['job_count'] / map_data['job_count'].max()) * cell_meters / 2
+    map_data['label'] = np.where(
+        map_data['places'] > 1,
+        map_data['place'] + ' +' + (map_data['places'] - 1).astype(str) + ' more',
+        map_data['place'],
+    )
+    return map_data
 
-    # Radius bubble
-    map_data['radius'] = map_data['job_count'] / map_data['job_count'].max() * 500000
 
-    # Tampilkan map
-    st.pydeck_chart(pdk.Deck(
+def job_map_deck(zoom, data_version):
+    map_data = job_map_data(zoom, data_version)
+
+    # Resolusi paling kasar dibuka di tengah dunia, sisanya di sel terbesar
+    if zoom == min(GRID_LEVELS) or map_data.empty:
+        latitude, longitude = 20, 0
+    else:
+        latitude, longitude = map_data.iloc[0][['lat', 'lon']]
+
+    return pdk.Deck(
         map_style='mapbox://styles/mapbox/light-v10',
         initial_view_state=pdk.ViewState(
-            latitude=20,
-            longitude=0,
-            zoom=1.5,
+            latitude=latitude,
+            longitude=longitude,
+            zoom=zoom,
             pitch=0,
         ),
         layers=[
@@ -44,8 +53,20 @@ def location_render():
                 get_position='[lon, lat]',
                 get_fill_color='[255, 100, 100, 160]',
                 get_radius='radius',
+                radius_min_pixels=2,
                 pickable=True,
             ),
         ],
-        tooltip={"text": "{country}\nJobs: {job_count}"}
-    ))
\ No newline at end of file
+        tooltip={"text": "{label}\nJobs: {job_count}"}
+    )
+
+
+@traced('render')
+def location_render():
+    st.header("🌍 Job Openings by Location")
+    st.markdown("This map shows the distribution of job vacancies by location, geocoded from each posting.")
+
+    resolution = st.select_slider('Map resolution', options=list(RESOLUTIONS), value='World')
+
+    # Tampilkan map
+    st.pydeck_chart(job_map_deck(RESOLUTIONS[resolution], db_generation()))
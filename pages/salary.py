@@ -1,7 +1,11 @@
+import numpy as np
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
-from preprocess_salary import load_salary_summary
+from config import FIGURE_CACHE_SIZE
+from db import db_generation
+from preprocess_salary import SALARY_BIN_WIDTH, load_salary_histogram, load_salary_quantiles, load_salary_summary
+from tracing import plotly_chart, traced, traced_cache_figure
 
  # Warna tema dark yang konsisten
 DARK_THEME = {
@@ -16,66 +20,50 @@ DARK_THEME = {
     'gradient_colors' : ['#014A7A', '#01579B', '#0277BD', '#0288D1', '#039BE5', '#03A9F4', '#29B6F6', '#4FC3F7', '#81D4FA', '#B3E5FC']
 }
 
-@st.cache_data(show_spinner=False)
-def salary_render():
-    st.header("💰 Salary Analysis")
-    
-    month_num = {
-        1: "January", 2: "February", 3: "March", 4: "April", 5: "May",
-        6: "June", 7: "July", 8: "August", 9: "September",
-        10: "October", 11: "November", 12: "December"
-    }
-    month_name_to_num = {v: k for k, v in month_num.items()}
-
-    # Selectbox bulan
-    month_options = ["All Months"] + list(month_num.values())
-    month_list = st.selectbox('Select a month', month_options, index=0)
+MONTH_NUM = {
+    1: "January", 2: "February", 3: "March", 4: "April", 5: "May",
+    6: "June", 7: "July", 8: "August", 9: "September",
+    10: "October", 11: "November", 12: "December"
+}
+MONTH_NAME_TO_NUM = {v: k for k, v in MONTH_NUM.items()}
 
-    month_chosen = None if month_list == "All Months" else month_name_to_num[month_list]
 
+# salary_df (per bulan, count > 0) dan summary_df (per job title) untuk bulan
+# terpilih; month_chosen None = semua bulan
+def salary_frames(month_chosen):
     # Load data dari DB
     salary_df = load_salary_summary(month_chosen)
 
     # Filter jika ingin menampilkan hanya data dengan count > 0
     salary_df = salary_df[salary_df['count'] > 0]
 
-    # Jika "All Months" tampilkan rata-rata across all months
-    if month_chosen is None:
-        summary_df = salary_df.groupby('job_title_short').agg(
-            avg_salary=('avg_salary', 'mean'),
-            max_salary=('max_salary', 'max'),
-            min_salary=('min_salary', 'min'),
-            count=('count', 'sum')
-        ).reset_index()
-        display_month = "All Months"
-    else:
-        summary_df = salary_df.copy()
-        display_month = month_list
+    # Rollup per job title dari ukuran aditif (exact, juga untuk "All Months"):
+    # avg = sum / count, std = sqrt(sum_sq / count - avg^2)
+    summary_df = salary_df.groupby('job_title_short').agg(
+        max_salary=('max_salary', 'max'),
+        min_salary=('min_salary', 'min'),
+        count=('count', 'sum'),
+        sum_salary=('sum_salary', 'sum'),
+        sum_salary_sq=('sum_salary_sq', 'sum'),
+    ).reset_index()
+    summary_df['avg_salary'] = summary_df['sum_salary'] / summary_df['count']
+    variance = summary_df['sum_salary_sq'] / summary_df['count'] - summary_df['avg_salary'] ** 2
+    summary_df['std_salary'] = np.sqrt(variance.clip(lower=0))
+
+    return salary_df, summary_df
+
+
+# Figure dibuat sekali per bulan (dan versi DB), dipakai ulang semua session.
+# Widget dan metric tetap jalan di tiap rerun di salary_render.
+@traced_cache_figure(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def salary_bar_figure(month_chosen, data_version):
+    _, summary_df = salary_frames(month_chosen)
+    display_month = "All Months" if month_chosen is None else MONTH_NUM[month_chosen]
 
     # Sort dan ambil top 10 highest avg salary
     display_df = summary_df.sort_values(by="avg_salary", ascending=False).head(10)
     chart_title = f"Top 10 Highest Paying Jobs - {display_month} 2023"
 
-    # Metrics
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        st.metric(label="🏢 Total Jobs", value=f"{summary_df['count'].sum():,}")
-
-    with col2:
-        avg_salary = summary_df['avg_salary'].mean()
-        st.metric(label="💰 Avg Salary", value=f"${avg_salary:,.0f}")
-
-    with col3:
-        max_salary = summary_df['max_salary'].max()
-        st.metric(label="🚀 Highest Salary", value=f"${max_salary:,.0f}")
-
-    with col4:
-        unique_titles = summary_df['job_title_short'].nunique()
-        st.metric(label="🎯 Job Types", value=unique_titles)
-
-    st.markdown("---")
-
     # Chart utama
     fig = go.Figure()
 
@@ -92,10 +80,11 @@ def salary_render():
         text=[f'${x:,.0f}' for x in display_df.sort_values(by="avg_salary")["avg_salary"]],
         textposition='outside',
         textfont=dict(color=DARK_THEME['text_color'], size=11),
-        customdata=display_df.sort_values(by="avg_salary")[["max_salary", "min_salary", "count"]].values,
+        customdata=display_df.sort_values(by="avg_salary")[["max_salary", "min_salary", "count", "std_salary"]].values,
         hovertemplate=(
             "<b>%{y}</b><br>"
             "💰 Avg Salary: $%{x:,.0f}<br>"
+            "📊 Std Dev: $%{customdata[3]:,.0f}<br>"
             "📈 Max Salary: $%{customdata[0]:,.0f}<br>"
             "📉 Min Salary: $%{customdata[1]:,.0f}<br>"
             "👥 Total Workers: %{customdata[2]}<br>"
@@ -140,105 +129,205 @@ def salary_render():
         )
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-    # Chart tambahan
-    st.markdown("---")
+@traced_cache_figure(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def salary_histogram_figure(month_chosen, data_version):
+    # Distribusi salary posting asli: bin yang sudah dihitung saat build,
+    # dijumlahkan across job title (dan bulan)
+    hist_df = load_salary_histogram(month_chosen)
+    bins = hist_df.groupby('salary_bin')['count'].sum().sort_index()
 
-    col1, col2 = st.columns(2)
+    fig_hist = go.Figure(go.Bar(
+        x=bins.index + SALARY_BIN_WIDTH / 2,
+        y=bins.values,
+        customdata=np.column_stack([bins.index, bins.index + SALARY_BIN_WIDTH]),
+    ))
 
-    with col1:
-        st.markdown("### 📊 Salary Distribution")
+    fig_hist.update_layout(
+        font=dict(color=DARK_THEME['text_color']),
+        title={
+            'text': "Salary Distribution",
+            'x': 0.5,  # Posisi tengah (0=kiri, 0.5=tengah, 1=kanan)
+            'xanchor': 'center',  # Anchor point di tengah
+            'y': 0.95,  # Posisi vertikal title (sama dengan pie chart)
+            'yanchor': 'top',
+            'font': {'size': 20, 'color': DARK_THEME['text_color']}
+        },
+        xaxis=dict(
+            gridcolor=DARK_THEME['grid_color'], 
+            title_text="Yearly Salary (USD)",
+            tickformat='$,.0f',
+            title_font=dict(size=18),  # Ukuran font title x-axis
+            tickfont=dict(size=14),    # Ukuran font tick labels
+            title_standoff=25          # Jarak title dari axis (default ~20)
+        ),
+        yaxis=dict(
+            gridcolor=DARK_THEME['grid_color'],
+            title_text="Number of Workers",
+            title_font=dict(size=18),  # Ukuran font title y-axis
+            tickfont=dict(size=14)     # Ukuran font tick labels
+        ),
+        bargap=0.1,
+        height=600,  # Sama dengan pie chart
+        margin=dict(l=80, r=20, t=80, b=80)  # Margin yang konsisten
+    )
 
-        # Pastikan menggunakan salary_df untuk distribusi gaji
-        fig_hist = px.histogram(
-            salary_df,  # Menggunakan salary_df untuk distribusi gaji
-            x="avg_salary",  # Menggunakan 'avg_salary' untuk distribusi gaji
-            nbins=20,
-            title="Salary Distribution"
-        )
+    fig_hist.update_traces(
+        textfont=dict(color=DARK_THEME['text_color'], size=12),  # Font size untuk text di pie chart
+        marker_color=DARK_THEME['primary_color'],
+        hovertemplate='<b>Salary:</b> $%{customdata[0]:,.0f} - $%{customdata[1]:,.0f}<br>' +
+                    '<b>Workers:</b> %{y}<br>' +
+                    '<extra></extra>'  # Menghilangkan box tambahan
+    )
 
-        fig_hist.update_layout(
-            font=dict(color=DARK_THEME['text_color']),
-            title={
-                'text': "Salary Distribution",
-                'x': 0.5,  # Posisi tengah (0=kiri, 0.5=tengah, 1=kanan)
-                'xanchor': 'center',  # Anchor point di tengah
-                'y': 0.95,  # Posisi vertikal title (sama dengan pie chart)
-                'yanchor': 'top',
-                'font': {'size': 20, 'color': DARK_THEME['text_color']}
-            },
-            xaxis=dict(
-                gridcolor=DARK_THEME['grid_color'], 
-                title_text="Average Salary (USD)",
-                title_font=dict(size=18),  # Ukuran font title x-axis
-                tickfont=dict(size=14),    # Ukuran font tick labels
-                title_standoff=25          # Jarak title dari axis (default ~20)
-            ),
-            yaxis=dict(
-                gridcolor=DARK_THEME['grid_color'],
-                title_text="Number of Workers",
-                title_font=dict(size=18),  # Ukuran font title y-axis
-                tickfont=dict(size=14)     # Ukuran font tick labels
-            ),
-            bargap=0.1,
-            height=600,  # Sama dengan pie chart
-            margin=dict(l=80, r=20, t=80, b=80)  # Margin yang konsisten
-        )
+    return fig_hist
 
-        fig_hist.update_traces(
-            textfont=dict(color=DARK_THEME['text_color'], size=12),  # Font size untuk text di pie chart
-            marker_color=DARK_THEME['primary_color'],
-            hovertemplate='<b>Average Salary:</b> %{x}<br>' +
-                        '<b>Workers:</b> %{y}<br>' +
-                        '<extra></extra>'  # Menghilangkan box tambahan
-        )
 
-        st.plotly_chart(fig_hist, use_container_width=True)
+@traced_cache_figure(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def salary_box_figure(month_chosen, data_version):
+    # Box per job title dari percentile yang sudah di-merge dari sketch
+    # (p25 / median / p75, whisker p10 - p90), tanpa baca posting asli
+    quantile_df = load_salary_quantiles(month_chosen)
+    quantile_df = quantile_df.dropna(subset=['job_title_short']).sort_values('p50')
+
+    fig_box = go.Figure(go.Box(
+        y=quantile_df['job_title_short'],
+        q1=quantile_df['p25'],
+        median=quantile_df['p50'],
+        q3=quantile_df['p75'],
+        lowerfence=quantile_df['p10'],
+        upperfence=quantile_df['p90'],
+        orientation='h',
+        marker_color=DARK_THEME['secondary_color'],
+        hoverinfo='y+x',
+    ))
+
+    fig_box.update_layout(
+        font=dict(color=DARK_THEME['text_color']),
+        title={
+            'text': "Salary Range by Job Title (P10 - P90)",
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 20, 'color': DARK_THEME['text_color']}
+        },
+        xaxis=dict(
+            gridcolor=DARK_THEME['grid_color'],
+            title_text="Yearly Salary (USD)",
+            tickformat='$,.0f',
+            title_font=dict(size=18),
+            tickfont=dict(size=14),
+            title_standoff=25
+        ),
+        yaxis=dict(
+            gridcolor=DARK_THEME['grid_color'],
+            title_text="Job Title",
+            title_font=dict(size=18),
+            tickfont=dict(size=14)
+        ),
+        height=500,
+        margin=dict(l=20, r=20, t=60, b=20),
+        showlegend=False
+    )
+
+    return fig_box
+
+
+@traced_cache_figure(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def job_title_pie_figure(month_chosen, data_version):
+    salary_df, _ = salary_frames(month_chosen)
+
+    # Jumlah posting (bukan jumlah baris bulan) per job title
+    job_counts = salary_df.groupby('job_title_short')['count'].sum().sort_values(ascending=False).head(8)
+
+    fig_pie = px.pie(
+        values=job_counts.values,
+        names=job_counts.index,
+        title="Job Title Distribution"
+    )
+
+    fig_pie.update_layout(
+        title={
+            'text': "Job Title Distribution",
+            'x': 0.5,  # Posisi tengah (0=kiri, 0.5=tengah, 1=kanan)
+            'xanchor': 'center',  # Anchor point di tengah
+            'y': 0.95,  # Posisi vertikal title yang sama dengan histogram
+            'yanchor': 'top',
+            'font': {'size': 20, 'color': DARK_THEME['text_color']}
+        },
+        font=dict(color=DARK_THEME['text_color'], size=14),  # Font size untuk legend
+        legend=dict(
+            orientation="h",  # horizontal
+            yanchor="top",
+            y=-0.05,  # Jarak legenda diperkecil (dari -0.1 ke -0.05)
+            xanchor="center",
+            x=0.5,    # centered horizontally
+            font=dict(size=14)  # Font size legend
+        ),
+        margin=dict(l=20, r=20, t=80, b=80),  # Margin top sama dengan histogram, bottom dikurangi
+        height=600,
+        showlegend=True
+    )
+
+    fig_pie.update_traces(
+        domain=dict(x=[0.1, 0.9], y=[0.15, 0.85]),  # Posisi pie chart disesuaikan untuk jarak legend lebih kecil
+        marker=dict(colors=DARK_THEME['accent_colors']),
+        textfont=dict(color=DARK_THEME['text_color'], size=12),  # Font size untuk text di pie chart
+        hovertemplate='<b>Job Title:</b> %{label}<br>' +
+                    '<b>Workers:</b> %{value}<br>' +
+                    '<extra></extra>'  # Menghilangkan box tambahan
+    )
+
+    return fig_pie
+
+
+@traced('render')
+def salary_render():
+    st.header("💰 Salary Analysis")
+
+    # Selectbox bulan
+    month_options = ["All Months"] + list(MONTH_NUM.values())
+    month_list = st.selectbox('Select a month', month_options, index=0)
+
+    month_chosen = None if month_list == "All Months" else MONTH_NAME_TO_NUM[month_list]
+
+    _, summary_df = salary_frames(month_chosen)
+
+    # Metrics
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric(label="🏢 Total Jobs", value=f"{summary_df['count'].sum():,}")
 
     with col2:
-        st.markdown("###  Job Title Distribution")
+        avg_salary = summary_df['sum_salary'].sum() / summary_df['count'].sum()
+        st.metric(label="💰 Avg Salary", value=f"${avg_salary:,.0f}")
 
-        # Gunakan job_df_filtered untuk distribusi job title
-        job_counts = salary_df['job_title_short'].value_counts().head(8)  # Gunakan data dari salary_df
+    with col3:
+        max_salary = summary_df['max_salary'].max()
+        st.metric(label="🚀 Highest Salary", value=f"${max_salary:,.0f}")
 
-        fig_pie = px.pie(
-            values=job_counts.values,
-            names=job_counts.index,
-            title="Job Title Distribution"
-        )
+    with col4:
+        unique_titles = summary_df['job_title_short'].nunique()
+        st.metric(label="🎯 Job Types", value=unique_titles)
 
-        fig_pie.update_layout(
-            title={
-                'text': "Job Title Distribution",
-                'x': 0.5,  # Posisi tengah (0=kiri, 0.5=tengah, 1=kanan)
-                'xanchor': 'center',  # Anchor point di tengah
-                'y': 0.95,  # Posisi vertikal title yang sama dengan histogram
-                'yanchor': 'top',
-                'font': {'size': 20, 'color': DARK_THEME['text_color']}
-            },
-            font=dict(color=DARK_THEME['text_color'], size=14),  # Font size untuk legend
-            legend=dict(
-                orientation="h",  # horizontal
-                yanchor="top",
-                y=-0.05,  # Jarak legenda diperkecil (dari -0.1 ke -0.05)
-                xanchor="center",
-                x=0.5,    # centered horizontally
-                font=dict(size=14)  # Font size legend
-            ),
-            margin=dict(l=20, r=20, t=80, b=80),  # Margin top sama dengan histogram, bottom dikurangi
-            height=600,
-            showlegend=True
-        )
+    st.markdown("---")
 
-        fig_pie.update_traces(
-            domain=dict(x=[0.1, 0.9], y=[0.15, 0.85]),  # Posisi pie chart disesuaikan untuk jarak legend lebih kecil
-            marker=dict(colors=DARK_THEME['accent_colors']),
-            textfont=dict(color=DARK_THEME['text_color'], size=12),  # Font size untuk text di pie chart
-            hovertemplate='<b>Job Title:</b> %{label}<br>' +
-                        '<b>Workers:</b> %{value}<br>' +
-                        '<extra></extra>'  # Menghilangkan box tambahan
-        )
+    plotly_chart(salary_bar_figure(month_chosen, db_generation()), use_container_width=True)
+
+    plotly_chart(salary_box_figure(month_chosen, db_generation()), use_container_width=True)
+
+
+    # Chart tambahan
+    st.markdown("---")
 
-        st.plotly_chart(fig_pie, use_container_width=True)
\ No newline at end of file
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("### 📊 Salary Distribution")
+        plotly_chart(salary_histogram_figure(month_chosen, db_generation()), use_container_width=True)
+
+    with col2:
+        st.markdown("###  Job Title Distribution")
+        plotly_chart(job_title_pie_figure(month_chosen, db_generation()), use_container_width=True)
\ No newline at end of file
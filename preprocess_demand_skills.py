@@ -1,81 +1,116 @@
-import sqlite3
 import pandas as pd
-import streamlit as st
 
-DB_PATH = 'jobs_skills.db'
-
-
-@st.cache_data(show_spinner=False)
-def create_demand_skill_summary():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("DROP TABLE IF EXISTS demand_skill_trend")
+from bitmap_index import bitmap_demand_skills, bitmap_index
+from columnar import create_table_as
+from config import BUILD_ENGINE, FILTER_BACKEND, QUERY_ENGINE
+from db import DB_PATH, read_sql
+from preprocess_dimensions import ALL_ID, label_condition
+from result_store import lookup_result
+from result_cache import cached_load
+from summary_registry import register_summary
+
+# Naikkan kalau query create_demand_skill_summary berubah (atau encoding dimensi berubah)
+DEMAND_SKILL_SUMMARY_VERSION = 5
+DEMAND_SKILL_SUMMARY_SCHEMA = {
+    'demand_skill_cube': ['posted_day', 'skill_id', 'job_title_short_id', 'schedule_type_id', 'job_title_count'],
+    'demand_skill_totals': ['skill_id', 'job_title_short_id', 'schedule_type_id', 'job_title_count'],
+}
+DEMAND_SKILL_SUMMARY_TABLES = list(DEMAND_SKILL_SUMMARY_SCHEMA)
+
+# Jumlah job_title unik tidak bisa dijumlahkan antar filter, jadi setiap level
+# rollup (title x schedule, title saja, schedule saja, semua) dihitung sendiri
+# dengan ALL_ID di kolom yang di-rollup
+ROLLUP_LEVELS = [
+    ('job_title_short_id', 'schedule_type_id'),
+    ('job_title_short_id', str(ALL_ID)),
+    (str(ALL_ID), 'schedule_type_id'),
+    (str(ALL_ID), str(ALL_ID)),
+]
+
+
+# Dari posting_skill_fact (satu baris per pasangan posting-skill, lihat
+# preprocess_posting_skill) dibuat cube jumlah job_title unik per (tanggal,
+# skill, title, schedule) dan totalnya per (skill, title, schedule) untuk
+# ranking top 5. Skill tanpa label (skill_id NULL) tidak ikut.
+def rollup_query(keys):
+    return "\nUNION ALL\n".join(
+        f"""
+        SELECT {', '.join(keys)}, {title} AS job_title_short_id, {schedule} AS schedule_type_id,
+               COUNT(DISTINCT job_title_id) AS job_title_count
+        FROM posting_skill_fact
+        WHERE {' AND '.join(f'{key} IS NOT NULL' for key in keys)}
+        GROUP BY {', '.join(keys + [col for col in (title, schedule) if col != str(ALL_ID)])}
+        """
+        for title, schedule in ROLLUP_LEVELS
+    )
 
-    cursor.execute("""
-        CREATE TABLE demand_skill_trend AS
-        SELECT 
-            DATE(j.job_posted_date) AS job_posted_date,
-            j.job_title_short,
-            j.job_schedule_type,
-            s.skills,
-            j.job_title
-        FROM job_postings_fact j
-        JOIN skills_job_dim sj ON sj.job_id = j.job_id
-        JOIN skills_dim s ON sj.skill_id = s.skill_id
-        WHERE s.skills IS NOT NULL
-    """)
-    conn.commit()
-    conn.close()
 
+@register_summary(
+    'demand_skills', DEMAND_SKILL_SUMMARY_VERSION, DEMAND_SKILL_SUMMARY_SCHEMA, sources=['posting_skill_fact'],
+)
+def create_demand_skill_summary(db_path=DB_PATH, engine=BUILD_ENGINE):
+    create_table_as(db_path, 'demand_skill_cube', rollup_query(['posted_day', 'skill_id']), engine='sqlite')
+    create_table_as(db_path, 'demand_skill_totals', rollup_query(['skill_id']), engine='sqlite')
 
-@st.cache_data(show_spinner=False)
-def load_demand_skills(job_title_short=None, job_schedule_type=None):
-    conn = sqlite3.connect(DB_PATH)
 
-    # Filter SQL dinamis
+def demand_skills_query(job_title_short=None, job_schedule_type=None):
+    # Filter SQL dinamis; filter kosong -> baris rollup
     conditions = []
     params = []
 
-    if job_title_short:
-        conditions.append("job_title_short = ?")
-        params.append(job_title_short)
+    sql, values = label_condition('dim_job_title_short', job_title_short, rollup=True)
+    conditions.append(sql)
+    params.extend(values)
 
-    if job_schedule_type:
-        conditions.append("job_schedule_type LIKE ?")
-        params.append(job_schedule_type)
+    sql, values = label_condition('dim_schedule_type', job_schedule_type, rollup=True)
+    conditions.append(sql)
+    params.extend(values)
 
-    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    where_clause = f"WHERE {' AND '.join(conditions)}"
 
+    # Top 5 dari demand_skill_totals, deret hariannya dari demand_skill_cube.
+    # Nama skill di-decode di hasil akhir, tanggal di load_demand_skills.
     query = f"""
-        SELECT *
-        FROM demand_skill_trend
+        WITH top_skills AS (
+            SELECT skill_id
+            FROM demand_skill_totals
+            {where_clause}
+            ORDER BY job_title_count DESC, skill_id
+            LIMIT 5
+        )
+        SELECT
+            c.posted_day,
+            s.skills,
+            c.job_title_count AS count
+        FROM demand_skill_cube c
+        JOIN top_skills t ON t.skill_id = c.skill_id
+        JOIN skills_dim s ON s.skill_id = c.skill_id
         {where_clause}
+        ORDER BY c.posted_day NULLS FIRST, s.skills
     """
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-
-    if df.empty:
-        return df
-
-    # Ambil top 5 skill berdasarkan jumlah job_title unik
-    top_skills = (
-        df.groupby("skills")["job_title"]
-        .nunique()
-        .sort_values(ascending=False)
-        .head(5)
-        .index.tolist()
-    )
-
-    # Filter skill yang termasuk top 5
-    df = df[df["skills"].isin(top_skills)]
-
-    # Hitung jumlah job_title unik per tanggal per skill
-    df_trend = (
-        df.groupby(["job_posted_date", "skills"])["job_title"]
-        .nunique()
-        .reset_index(name="count")
-        .sort_values(["job_posted_date", "skills"])
-    )
-
-    return df_trend
\ No newline at end of file
+    return query, params + params
+
+
+# Multi-select (list) tidak bisa dijawab dari cube: jumlah job_title unik per
+# nilai filter tidak bisa dijumlahkan, jadi selalu lewat bitmap index
+def demand_skills_result(job_title_short=None, job_schedule_type=None, backend=FILTER_BACKEND,
+                         db_path=DB_PATH, engine=QUERY_ENGINE):
+    if backend == 'bitmap' or any(isinstance(v, (list, tuple)) for v in (job_title_short, job_schedule_type)):
+        df = bitmap_demand_skills(bitmap_index(db_path), job_title_short, job_schedule_type)
+    else:
+        query, params = demand_skills_query(job_title_short, job_schedule_type)
+        df = read_sql(query, params=params, db_path=db_path, engine=engine)
+    dates = pd.to_datetime(df.pop('posted_day'), unit='D')
+    df.insert(0, 'job_posted_date', dates.dt.strftime('%Y-%m-%d').where(dates.notna(), None))
+    return df
+
+
+# backend 'materialized': hasil dari build, kombinasi lain dihitung lewat 'sql'
+@cached_load(show_spinner=False)
+def load_demand_skills(job_title_short=None, job_schedule_type=None, backend=FILTER_BACKEND):
+    if backend == 'materialized':
+        df = lookup_result('demand_skills', job_title_short, job_schedule_type)
+        if df is not None:
+            return df
+        backend = 'sql'
+    return demand_skills_result(job_title_short, job_schedule_type, backend)
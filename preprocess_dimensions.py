@@ -0,0 +1,98 @@
+import sqlite3
+
+from columnar import run_query
+from config import BUILD_ENGINE, QUERY_ENGINE
+from db import DB_PATH, read_sql
+from result_cache import cached_load
+from summary_registry import register_summary
+
+# Id diberikan urut label, jadi build ulang dari source yang sama selalu
+# menghasilkan id yang sama. Kalau skema encoding berubah, naikkan juga versi
+# summary yang memakai id ini (top skills, demand skills).
+DIMENSION_VERSION = 2
+
+# (tabel dimensi, kolom id, kolom label, tabel sumber, kolom sumber, collate label)
+# Schedule type NOCASE: filter dashboard case-insensitive (dulu pakai LIKE), jadi
+# varian huruf besar/kecil digabung ke satu id.
+DIMENSIONS = [
+    ('dim_job_title_short', 'job_title_short_id', 'job_title_short', 'job_postings_fact', 'job_title_short', 'BINARY'),
+    ('dim_job_title', 'job_title_id', 'job_title', 'job_postings_fact', 'job_title', 'BINARY'),
+    ('dim_schedule_type', 'schedule_type_id', 'job_schedule_type', 'job_postings_fact', 'job_schedule_type', 'NOCASE'),
+    ('dim_skill_type', 'skill_type_id', 'skill_type', 'skills_dim', 'type', 'BINARY'),
+]
+DIMENSION_TABLES = [table for table, *_ in DIMENSIONS]
+
+# Id 0 dipakai di tabel cube sebagai "semua nilai" (id asli mulai dari 1)
+ALL_ID = 0
+
+
+def dimension_queries(engine=BUILD_ENGINE):
+    return [
+        (table, f"""
+            SELECT MIN({source_col}) AS {label_col}
+            FROM {source}
+            WHERE {source_col} IS NOT NULL
+            GROUP BY {source_col}{'' if collate == 'BINARY' else f' COLLATE {collate}'}
+            ORDER BY 1
+        """, [])
+        for table, _, label_col, source, source_col, collate in DIMENSIONS
+    ]
+
+
+# Label diambil lewat engine build; tabelnya selalu dibuat di SQLite karena
+# butuh INTEGER PRIMARY KEY dan collation di kolom label
+@register_summary(
+    'dimensions', DIMENSION_VERSION,
+    schema={table: [id_col, label_col] for table, id_col, label_col, *_ in DIMENSIONS},
+    sources=sorted({source for *_, source, _, _ in DIMENSIONS}),
+)
+def create_dimension_tables(db_path=DB_PATH, engine=BUILD_ENGINE):
+    labels = {table: run_query(db_path, sql, params, engine) for table, sql, params in dimension_queries(engine)}
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    for table, id_col, label_col, _, _, collate in DIMENSIONS:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(f"""
+            CREATE TABLE {table} (
+                {id_col} INTEGER PRIMARY KEY,
+                {label_col} TEXT NOT NULL UNIQUE COLLATE {collate}
+            )
+        """)
+        cursor.executemany(
+            f"INSERT INTO {table} ({label_col}) VALUES (?)",
+            ((label,) for label in labels[table][label_col]),
+        )
+
+    conn.commit()
+    conn.close()
+
+
+# Kondisi WHERE untuk filter berdasarkan label, di-resolve ke id lewat tabel
+# dimensi (perbandingan ikut collation kolom label). Untuk tabel cube, filter
+# kosong berarti baris rollup ALL_ID.
+# Collation ditulis eksplisit supaya sama juga di DuckDB (export parquet tidak
+# membawa collation kolom).
+def label_condition(table, value, rollup=False):
+    _, id_col, label_col, _, _, collate = next(d for d in DIMENSIONS if d[0] == table)
+    if value is None and rollup:
+        return f"{id_col} = {ALL_ID}", []
+    label = label_col if collate == 'BINARY' else f"{label_col} COLLATE {collate}"
+    if isinstance(value, (list, tuple)):
+        # Multi-select: gabungan beberapa label
+        placeholders = ", ".join("?" for _ in value)
+        return f"{id_col} IN (SELECT {id_col} FROM {table} WHERE {label} IN ({placeholders}))", list(value)
+    return f"{id_col} = (SELECT {id_col} FROM {table} WHERE {label} = ?)", [value]
+
+
+# Semua label satu dimensi, urut id (= urut label). Dipakai untuk pilihan
+# filter di dashboard dan daftar kombinasi yang dimaterialisasi saat build.
+def dimension_labels(table, db_path=DB_PATH, engine=QUERY_ENGINE):
+    _, id_col, label_col, *_ = next(d for d in DIMENSIONS if d[0] == table)
+    return read_sql(f"SELECT {label_col} FROM {table} ORDER BY {id_col}", db_path=db_path, engine=engine)[label_col].tolist()
+
+
+@cached_load(show_spinner=False)
+def load_filter_options(table):
+    return dimension_labels(table)
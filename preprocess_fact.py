@@ -0,0 +1,121 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from columnar import iter_query
+from config import BUILD_ENGINE
+from db import DB_PATH
+from preprocess_introduction import INTRO_FACT_SCHEMA, write_intro_fact_summaries
+from preprocess_location import JOB_COUNTRY_SUMMARY_SCHEMA, JOB_COUNTRY_SUMMARY_VERSION, write_location_summaries
+from preprocess_salary import SALARY_BIN_WIDTH, SALARY_SUMMARY_SCHEMA, SALARY_SUMMARY_VERSION, write_salary_summaries
+from quantile_sketch import build_sketches, merge
+from summary_registry import register_summary
+
+# Summary salary, intro (top job title, total / rata-rata salary) dan location
+# dulu masing-masing men-scan job_postings_fact. Sekarang satu scan per chunk
+# menghitung partial yang bisa digabung (count, sum, min / max, histogram,
+# sketch, pasangan job title - job_id unik, jumlah per lokasi), lalu tiap modul
+# menulis tabelnya dari hasil gabungan.
+FACT_SCAN_VERSION = 1
+FACT_SUMMARY_VERSION = f"{FACT_SCAN_VERSION}+salary{SALARY_SUMMARY_VERSION}+location{JOB_COUNTRY_SUMMARY_VERSION}"
+FACT_SUMMARY_SCHEMA = {**SALARY_SUMMARY_SCHEMA, **INTRO_FACT_SCHEMA, **JOB_COUNTRY_SUMMARY_SCHEMA}
+FACT_SUMMARY_TABLES = list(FACT_SUMMARY_SCHEMA)
+
+# Baris job_postings_fact per chunk scan
+FACT_CHUNK_SIZE = 500_000
+
+SALARY_CELL = ['job_title_short', 'month']
+
+
+def fact_scan_queries(engine=BUILD_ENGINE):
+    return [
+        ('fact_scan', """
+            SELECT
+                job_id,
+                job_title_short,
+                CAST(strftime('%m', job_posted_date) AS INTEGER) AS month,
+                job_country,
+                job_location,
+                salary_year_avg
+            FROM job_postings_fact
+        """, []),
+    ]
+
+
+def _key(value):
+    return None if pd.isna(value) else value
+
+
+# Partial satu chunk; semua ukurannya aditif / bisa di-merge antar chunk
+def _scan_chunk(chunk, sketches):
+    # month bisa int64 atau float64 (chunk dengan NULL), samakan dulu
+    chunk = chunk.assign(month=chunk['month'].astype('float64'))
+    salaried = chunk[chunk['salary_year_avg'].notna()]
+    salary = salaried['salary_year_avg']
+    salaried = salaried.assign(
+        salary_sq=salary * salary,
+        salary_bin=np.floor(salary / SALARY_BIN_WIDTH).astype('int64') * SALARY_BIN_WIDTH,
+    )
+
+    cells = salaried.groupby(SALARY_CELL, dropna=False, sort=False)
+    cell_keys = cells.size().index
+    for (title, month), sketch in zip(
+        cell_keys,
+        build_sketches(cells.ngroup().to_numpy(), salary.to_numpy(), len(cell_keys)),
+    ):
+        key = (_key(title), None if pd.isna(month) else int(month))
+        sketches[key] = merge([sketches[key], sketch]) if key in sketches else sketch
+
+    return {
+        'cells': cells.agg(
+            count=('salary_year_avg', 'size'),
+            sum_salary=('salary_year_avg', 'sum'),
+            sum_salary_sq=('salary_sq', 'sum'),
+            min_salary=('salary_year_avg', 'min'),
+            max_salary=('salary_year_avg', 'max'),
+        ).reset_index(),
+        'histogram': salaried.groupby([*SALARY_CELL, 'salary_bin'], dropna=False, sort=False)
+                             .size().rename('count').reset_index(),
+        'title_jobs': chunk.loc[chunk['job_id'].notna(), ['job_title_short', 'job_id']].drop_duplicates(),
+        'countries': chunk.groupby('job_country', sort=False).size(),
+        'locations': chunk.groupby(['job_location', 'job_country'], dropna=False, sort=False)
+                          .size().rename('job_count').reset_index(),
+    }
+
+
+def _combine(frames, keys, **aggregations):
+    frame = pd.concat(frames, ignore_index=True)
+    return frame.groupby(keys, dropna=False, sort=False).agg(**aggregations).reset_index()
+
+
+@register_summary('fact', FACT_SUMMARY_VERSION, FACT_SUMMARY_SCHEMA, sources=['job_postings_fact'])
+def create_fact_summaries(db_path=DB_PATH, engine=BUILD_ENGINE, chunk_size=FACT_CHUNK_SIZE):
+    (_, sql, params), = fact_scan_queries(engine)
+    sketches = {}
+    partials = [_scan_chunk(chunk, sketches) for chunk in iter_query(db_path, sql, params, engine, chunk_size)]
+    if not partials:
+        raise RuntimeError("job_postings_fact kosong")
+
+    def collect(name):
+        return [partial[name] for partial in partials]
+
+    cells = _combine(
+        collect('cells'), SALARY_CELL,
+        count=('count', 'sum'), sum_salary=('sum_salary', 'sum'), sum_salary_sq=('sum_salary_sq', 'sum'),
+        min_salary=('min_salary', 'min'), max_salary=('max_salary', 'max'),
+    )
+    histogram = _combine(collect('histogram'), [*SALARY_CELL, 'salary_bin'], count=('count', 'sum'))
+    title_jobs = pd.concat(collect('title_jobs'), ignore_index=True).drop_duplicates()
+    title_jobs = title_jobs.groupby('job_title_short', dropna=False).size()
+    countries = pd.concat(collect('countries')).groupby(level=0).sum()
+    locations = _combine(collect('locations'), ['job_location', 'job_country'], job_count=('job_count', 'sum'))
+
+    conn = sqlite3.connect(db_path)
+    try:
+        write_salary_summaries(conn, cells, histogram, sketches)
+        write_intro_fact_summaries(conn, title_jobs, cells['count'].sum(), cells['sum_salary'].sum())
+        write_location_summaries(conn, countries, locations)
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,68 @@
+import sqlite3
+
+from config import BUILD_ENGINE
+from db import DB_PATH
+from preprocess_demand_skills import demand_skills_result
+from preprocess_dimensions import DIMENSION_TABLES, dimension_labels
+from preprocess_salary import salary_histogram_result, salary_quantiles_result, salary_result
+from preprocess_top_skills import TOP_N, top_skills_result
+from result_store import RESULT_TABLE, encode_frame, result_key
+from summary_registry import register_summary
+
+# Dihitung dari tabel summary lain; kalau salah satunya dibuild ulang, ini ikut
+# dibuild ulang (dependensi di registry). Naikkan kalau kombinasi / format berubah.
+FILTER_RESULTS_VERSION = 4
+FILTER_RESULTS_SCHEMA = {RESULT_TABLE: ['view', 'key', 'payload']}
+FILTER_RESULTS_TABLES = list(FILTER_RESULTS_SCHEMA)
+
+MONTHS = list(range(1, 13))
+
+
+# (view, parameter loader, fungsi hitung, opsi) untuk setiap kombinasi filter
+# dashboard. Nilai filter diambil dari tabel dimensi, None = "semua". Selalu
+# dihitung exact dari summary di SQLite, apa pun backend / engine runtime.
+def filter_combinations(db_path=DB_PATH):
+    titles = [None] + dimension_labels('dim_job_title_short', db_path, 'sqlite')
+    skill_types = [None] + dimension_labels('dim_skill_type', db_path, 'sqlite')
+    schedules = [None] + dimension_labels('dim_schedule_type', db_path, 'sqlite')
+
+    for title in titles:
+        for skill_type in skill_types:
+            yield 'top_skills', (title, skill_type, TOP_N), top_skills_result, {'distinct_counts': 'exact', 'backend': 'sql'}
+        for schedule in schedules:
+            yield 'demand_skills', (title, schedule), demand_skills_result, {'backend': 'sql'}
+    for month in [None] + MONTHS:
+        yield 'salary', (month,), salary_result, {}
+        yield 'salary_histogram', (month,), salary_histogram_result, {}
+        yield 'salary_quantiles', (month, None, True), salary_quantiles_result, {}
+
+
+# engine tidak dipakai: semua input sudah berupa summary di SQLite
+@register_summary(
+    'filter_results', FILTER_RESULTS_VERSION, FILTER_RESULTS_SCHEMA,
+    sources=[
+        *DIMENSION_TABLES, 'skills_dim', 'job_title_skill_count', 'demand_skill_cube', 'demand_skill_totals',
+        'salary_summary', 'salary_histogram', 'salary_sketch',
+    ],
+)
+def create_filter_results(db_path=DB_PATH, engine=BUILD_ENGINE):
+    rows = [
+        (view, result_key(*params), encode_frame(compute(*params, db_path=db_path, engine='sqlite', **options)))
+        for view, params, compute, options in filter_combinations(db_path)
+    ]
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {RESULT_TABLE}")
+        conn.execute(f"""
+            CREATE TABLE {RESULT_TABLE} (
+                view TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (view, key)
+            ) WITHOUT ROWID
+        """)
+        conn.executemany(f"INSERT INTO {RESULT_TABLE} VALUES (?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
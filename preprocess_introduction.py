@@ -1,87 +1,76 @@
-import sqlite3
-import streamlit as st
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
-DB_PATH = 'jobs_skills.db'
+from columnar import create_table_as, write_arrow_table
+from config import BUILD_ENGINE
+from db import DB_PATH, read_sql
+from result_cache import cached_load
+from summary_registry import register_summary
 
-@st.cache_data(show_spinner=False)
-def create_all_intro_summaries():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Naikkan kalau query create_all_intro_summaries / write_intro_fact_summaries berubah
+INTRO_SUMMARY_VERSION = 4
+INTRO_SUMMARY_SCHEMA = {
+    'skill_type_distribution_summary': ['skill_type', 'job_title_count'],
+}
+INTRO_SUMMARY_TABLES = list(INTRO_SUMMARY_SCHEMA)
 
-    # 1. Top 5 Most In-Demand Job Titles
-    cursor.execute("DROP TABLE IF EXISTS top_job_title_summary")
-    cursor.execute("""
-        CREATE TABLE top_job_title_summary AS
-        SELECT job_title_short, COUNT(DISTINCT job_id) AS count
-        FROM job_postings_fact
-        GROUP BY job_title_short
-        ORDER BY count DESC
-        LIMIT 5
-    """)
+# Dibuat dari scan tunggal job_postings_fact (lihat preprocess_fact)
+INTRO_FACT_SCHEMA = {
+    'top_job_title_summary': ['job_title_short', 'count'],
+    'job_summary_stats': ['total_jobs', 'avg_salary'],
+}
 
-    # 2. Skill Type Distribution
-    cursor.execute("DROP TABLE IF EXISTS skill_type_distribution_summary")
-    cursor.execute("""
-        CREATE TABLE skill_type_distribution_summary AS
-        SELECT s.type AS skill_type, COUNT(DISTINCT j.job_title) AS job_title_count
-        FROM skills_job_dim sj
-        JOIN skills_dim s ON sj.skill_id = s.skill_id
-        JOIN job_postings_fact j ON sj.job_id = j.job_id
-        WHERE s.type IS NOT NULL
-        GROUP BY s.type
-    """)
+# Jumlah job title di chart Top Job Titles
+TOP_JOB_TITLES = 5
 
-    # 3. Job Country Distribution
-    cursor.execute("DROP TABLE IF EXISTS job_country_summary")
-    cursor.execute("""
-        CREATE TABLE job_country_summary AS
-        SELECT job_country, COUNT(*) AS count
-        FROM job_postings_fact
-        GROUP BY job_country
-        ORDER BY count DESC
-    """)
+def intro_summary_queries():
+    return [
+        # Skill Type Distribution, dari join posting-skill (lihat preprocess_posting_skill)
+        ('skill_type_distribution_summary', """
+            SELECT st.skill_type, COUNT(DISTINCT p.job_title_id) AS job_title_count
+            FROM posting_skill_fact p
+            JOIN dim_skill_type st ON st.skill_type_id = p.skill_type_id
+            GROUP BY st.skill_type
+            ORDER BY st.skill_type
+        """, []),
+    ]
 
-    # 4. Total Jobs & Average Salary
-    cursor.execute("DROP TABLE IF EXISTS job_summary_stats")
-    cursor.execute("""
-        CREATE TABLE job_summary_stats AS
-        SELECT 
-            COUNT(*) AS total_jobs,
-            ROUND(AVG(salary_year_avg), 2) AS avg_salary
-        FROM job_postings_fact
-        WHERE salary_year_avg IS NOT NULL
-    """)
+@register_summary(
+    'introduction', INTRO_SUMMARY_VERSION, INTRO_SUMMARY_SCHEMA, sources=['posting_skill_fact', 'dim_skill_type'],
+)
+def create_all_intro_summaries(db_path=DB_PATH, engine=BUILD_ENGINE):
+    for table, sql, params in intro_summary_queries():
+        create_table_as(db_path, table, sql, params, engine='sqlite')
 
-    conn.commit()
-    conn.close()
+# title_jobs: jumlah job_id unik per job_title_short (index, NaN = NULL);
+# salary_count / salary_sum: posting yang punya salary_year_avg
+def write_intro_fact_summaries(conn, title_jobs, salary_count, salary_sum):
+    # Top Job Titles: urut jumlah desc, seri urut nama (NULL duluan)
+    top = title_jobs.rename('count').rename_axis('job_title_short').reset_index()
+    top = top.sort_values(['count', 'job_title_short'], ascending=[False, True], na_position='first', kind='stable')
+    write_arrow_table(conn, 'top_job_title_summary', pa.Table.from_pandas(top.head(TOP_JOB_TITLES), preserve_index=False))
 
+    # Total Jobs & Average Salary
+    stats = pd.DataFrame({
+        'total_jobs': [int(salary_count)],
+        'avg_salary': [round(float(salary_sum / salary_count), 2) if salary_count else np.nan],
+    })
+    write_arrow_table(conn, 'job_summary_stats', pa.Table.from_pandas(stats, preserve_index=False))
 
 
-@st.cache_data(show_spinner=False)
+@cached_load(show_spinner=False)
 def load_top_job_title_summary():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM top_job_title_summary", conn)
-    conn.close()
-    return df
+    return read_sql("SELECT * FROM top_job_title_summary")
 
-@st.cache_data(show_spinner=False)
+@cached_load(show_spinner=False)
 def load_skill_type_distribution():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM skill_type_distribution_summary", conn)
-    conn.close()
-    return df
+    return read_sql("SELECT * FROM skill_type_distribution_summary")
 
-@st.cache_data(show_spinner=False)
+@cached_load(show_spinner=False)
 def load_job_country():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM job_country_summary", conn)
-    conn.close()
-    return df
+    return read_sql("SELECT * FROM job_country_summary")
 
-@st.cache_data(show_spinner=False)
+@cached_load(show_spinner=False)
 def load_job_summary_stats():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM job_summary_stats", conn)
-    conn.close()
-    return df
+    return read_sql("SELECT * FROM job_summary_stats")
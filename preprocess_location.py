@@ -1,41 +1,72 @@
-import sqlite3
 import pandas as pd
-import streamlit as st
+import pyarrow as pa
 
-DB_PATH = 'jobs_skills.db'
+from columnar import write_arrow_table
+from db import read_sql
+from geocode import PRECISIONS, geocode, grid_bins
+from result_cache import cached_load
 
-@st.cache_data(show_spinner=False)
-def create_job_country_summary():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Naikkan kalau write_location_summaries berubah, geocode.py / gazetteer.csv
+# berubah, atau GRID_LEVELS berubah (ikut versi summary 'fact', lihat preprocess_fact)
+JOB_COUNTRY_SUMMARY_VERSION = 4
+JOB_COUNTRY_SUMMARY_SCHEMA = {
+    'job_country_summary': ['country', 'job_count'],
+    'job_location_geocode': ['job_location', 'job_country', 'job_count', 'place', 'precision', 'lat', 'lon'],
+    'job_location_grid': ['zoom', 'lat_bin', 'lon_bin', 'lat', 'lon', 'job_count', 'place', 'places'],
+}
+JOB_COUNTRY_SUMMARY_TABLES = list(JOB_COUNTRY_SUMMARY_SCHEMA)
 
-    # Hapus jika tabel sudah ada
-    cursor.execute("DROP TABLE IF EXISTS job_country_summary")
+# Resolusi map: zoom pydeck -> ukuran sel grid (derajat). Map cuma membaca
+# sel untuk zoom yang dipilih.
+GRID_LEVELS = {1: 10.0, 3: 2.0, 6: 0.25}
 
-    # Negara yang akan dikecualikan
-    invalid_countries = ("Remote", "Worldwide", "Europe", "Asia", "Africa", "", None)
-    valid_exclusions = [c for c in invalid_countries if c not in (None, '')]
-    placeholders = ",".join("?" for _ in valid_exclusions)
+# Negara yang dikecualikan dari job_country_summary
+INVALID_COUNTRIES = ["Remote", "Worldwide", "Europe", "Asia", "Africa"]
 
-    query = f"""
-        CREATE TABLE job_country_summary AS
-        SELECT 
-            job_country AS country,
-            COUNT(*) AS job_count
-        FROM job_postings_fact
-        WHERE job_country NOT IN ({placeholders})
-          AND job_country IS NOT NULL
-        GROUP BY job_country
-    """
+# Dibuat dari scan tunggal job_postings_fact (lihat preprocess_fact):
+# country_counts = jumlah posting per job_country (index, tanpa NULL),
+# location_counts = DataFrame job_location, job_country, job_count
+def write_location_summaries(conn, country_counts, location_counts):
+    countries = country_counts[~country_counts.index.isin(INVALID_COUNTRIES)].sort_index()
+    countries = countries.rename('job_count').rename_axis('country').reset_index()
+    write_arrow_table(conn, 'job_country_summary', pa.Table.from_pandas(countries, preserve_index=False))
+    write_job_location_grid(conn, location_counts)
 
-    cursor.execute(query, valid_exclusions)
-    conn.commit()
-    conn.close()
+# Geocode tiap pasangan (job_location, job_country) unik sekali, lalu agregasi
+# jumlah posting ke grid di setiap level GRID_LEVELS
+def write_job_location_grid(conn, location_counts):
+    locations = location_counts.sort_values(['job_location', 'job_country'], na_position='first', kind='stable')
+    locations = geocode(locations.reset_index(drop=True))
+    write_arrow_table(conn, 'job_location_geocode', pa.Table.from_pandas(locations, preserve_index=False))
 
+    grids = [
+        grid_bins(locations, cell_deg).assign(zoom=zoom)
+        for zoom, cell_deg in GRID_LEVELS.items()
+    ]
+    grid = pd.concat(grids, ignore_index=True)
+    grid = grid[['zoom', 'lat_bin', 'lon_bin', 'lat', 'lon', 'job_count', 'place', 'places']]
+    write_arrow_table(conn, 'job_location_grid', pa.Table.from_pandas(grid, preserve_index=False))
 
-@st.cache_data(show_spinner=False)
+# Porsi posting per presisi geocoding (untuk build report)
+def geocode_coverage(conn):
+    counts = pd.read_sql_query(
+        "SELECT COALESCE(precision, 'unmatched') AS precision, SUM(job_count) AS job_count "
+        "FROM job_location_geocode GROUP BY 1",
+        conn,
+    ).set_index('precision')['job_count']
+    total = counts.sum()
+    return {
+        'postings': int(total),
+        **{precision: round(float(counts.get(precision, 0) / total), 4) for precision in [*PRECISIONS, 'unmatched']},
+    }
+
+@cached_load(show_spinner=False)
 def load_job_country_summary():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM job_country_summary", conn)
-    conn.close()
-    return df
+    return read_sql("SELECT * FROM job_country_summary")
+
+@cached_load(show_spinner=False)
+def load_job_location_grid(zoom):
+    return read_sql(
+        "SELECT lat, lon, job_count, place, places FROM job_location_grid WHERE zoom = ? ORDER BY job_count DESC",
+        params=(zoom,),
+    )
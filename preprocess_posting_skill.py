@@ -0,0 +1,48 @@
+from columnar import create_table_as, epoch_day
+from config import BUILD_ENGINE
+from db import DB_PATH
+from preprocess_dimensions import DIMENSION_TABLES
+from summary_registry import register_summary
+
+# Naikkan kalau query create_posting_skill_fact berubah (atau encoding dimensi
+# berubah); summary skill yang membacanya ikut dibuild ulang
+POSTING_SKILL_VERSION = 1
+POSTING_SKILL_SCHEMA = {
+    'posting_skill_fact': ['job_id', 'skill_id', 'skill_type_id', 'job_title_short_id', 'schedule_type_id',
+                           'posted_day', 'job_title_id'],
+}
+POSTING_SKILL_TABLES = list(POSTING_SKILL_SCHEMA)
+
+# Join skills_job_dim x skills_dim x job_postings_fact dibuat sekali di sini;
+# top skills, demand skills, skill type distribution dan bitmap index membaca
+# tabel ini, bukan join ulang. Satu baris per pasangan posting-skill, semua
+# kolom integer (tanggal = hari sejak 1970-01-01, sisanya id dim_*), urut
+# skill_id lalu job_id. skill_id NULL = skill tanpa label: tetap dihitung di
+# total Top Skills dan skill type, tapi tidak pernah tampil sebagai skill.
+def posting_skill_queries(engine=BUILD_ENGINE):
+    return [('posting_skill_fact', f"""
+        SELECT
+            sj.job_id,
+            CASE WHEN s.skills IS NOT NULL THEN s.skill_id END AS skill_id,
+            st.skill_type_id,
+            jts.job_title_short_id,
+            sch.schedule_type_id,
+            {epoch_day('j.job_posted_date', engine)} AS posted_day,
+            jt.job_title_id
+        FROM skills_job_dim sj
+        JOIN skills_dim s ON sj.skill_id = s.skill_id
+        JOIN job_postings_fact j ON sj.job_id = j.job_id
+        LEFT JOIN dim_skill_type st ON st.skill_type = s.type
+        LEFT JOIN dim_job_title_short jts ON jts.job_title_short = j.job_title_short
+        LEFT JOIN dim_schedule_type sch ON sch.job_schedule_type COLLATE NOCASE = j.job_schedule_type
+        LEFT JOIN dim_job_title jt ON jt.job_title = j.job_title
+        ORDER BY 2 NULLS FIRST, 1, 3 NULLS FIRST
+    """, [])]
+
+@register_summary(
+    'posting_skill', POSTING_SKILL_VERSION, POSTING_SKILL_SCHEMA,
+    sources=['job_postings_fact', 'skills_job_dim', 'skills_dim', *DIMENSION_TABLES],
+)
+def create_posting_skill_fact(db_path=DB_PATH, engine=BUILD_ENGINE):
+    for table, sql, params in posting_skill_queries(engine):
+        create_table_as(db_path, table, sql, params, engine, sqlite_tables=DIMENSION_TABLES)
@@ -1,42 +1,139 @@
-import sqlite3
 import pandas as pd
-import streamlit as st
-
-DB_PATH = 'jobs_skills.db'
-
-@st.cache_data(show_spinner=False)
-def create_salary_summary():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DROP TABLE IF EXISTS salary_summary")
-    cursor.execute("""
-        CREATE TABLE salary_summary AS
-        SELECT
-            job_title_short,
-            CAST(strftime('%m', job_posted_date) AS INTEGER) AS month,
-            COUNT(*) AS count,
-            AVG(salary_year_avg) AS avg_salary,
-            MAX(salary_year_avg) AS max_salary,
-            MIN(salary_year_avg) AS min_salary
-        FROM job_postings_fact
-        WHERE salary_year_avg IS NOT NULL
-        GROUP BY job_title_short, month
+import pyarrow as pa
+
+from columnar import write_arrow_table
+from config import FILTER_BACKEND, QUERY_ENGINE
+from db import DB_PATH, read_sql
+from result_store import lookup_result
+from result_cache import cached_load
+from quantile_sketch import count, from_blob, merge, quantiles, to_blob
+
+# Naikkan kalau write_salary_summaries berubah, supaya tabelnya dibuild ulang
+# (ikut versi summary 'fact', lihat preprocess_fact)
+SALARY_SUMMARY_VERSION = 5
+SALARY_SUMMARY_SCHEMA = {
+    'salary_summary': ['job_title_short', 'month', 'count', 'avg_salary', 'max_salary', 'min_salary',
+                       'sum_salary', 'sum_salary_sq'],
+    'salary_histogram': ['job_title_short', 'month', 'salary_bin', 'count'],
+    'salary_sketch': ['job_title_short', 'month', 'sketch'],
+}
+SALARY_SUMMARY_TABLES = list(SALARY_SUMMARY_SCHEMA)
+
+# Lebar bin histogram salary (USD per tahun)
+SALARY_BIN_WIDTH = 10_000
+
+# Kolom percentile hasil load_salary_quantiles
+SALARY_QUANTILES = {'p10': 0.10, 'p25': 0.25, 'p50': 0.50, 'p75': 0.75, 'p90': 0.90}
+
+# salary_summary per (job_title_short, month) menyimpan ukuran aditif (count,
+# sum, sum kuadrat), jadi rollup apa pun (mis. semua bulan) bisa dihitung
+# exact: avg = sum / count, var = sum_sq / count - avg^2.
+# salary_histogram: jumlah posting per bin, salary_bin = batas bawah bin (USD).
+# salary_sketch: satu sketch quantile per sel yang sama. Sketch bisa di-merge,
+# jadi percentile untuk semua bulan / beberapa job title cukup merge
+# sel-selnya (lihat quantile_sketch).
+# Ketiganya dibuat dari scan tunggal job_postings_fact (lihat preprocess_fact):
+# cells dan histogram berisi partial yang sudah digabung antar chunk, sketches
+# {(job_title_short, month): sketch}.
+def write_salary_summaries(conn, cells, histogram, sketches):
+    cells = cells.assign(avg_salary=cells['sum_salary'] / cells['count'])
+    cells = _sort_cells(cells, ['job_title_short', 'month'])
+    write_arrow_table(conn, 'salary_summary', pa.Table.from_pandas(
+        cells[SALARY_SUMMARY_SCHEMA['salary_summary']], preserve_index=False,
+    ))
+
+    histogram = _sort_cells(histogram, ['job_title_short', 'month', 'salary_bin'])
+    write_arrow_table(conn, 'salary_histogram', pa.Table.from_pandas(
+        histogram[SALARY_SUMMARY_SCHEMA['salary_histogram']], preserve_index=False,
+    ))
+
+    conn.execute("DROP TABLE IF EXISTS salary_sketch")
+    conn.execute("""
+        CREATE TABLE salary_sketch (
+            job_title_short TEXT,
+            month INTEGER,
+            sketch BLOB NOT NULL
+        )
     """)
-    conn.commit()
-    conn.close()
+    # Key sketch: None untuk NULL, urut NULLS FIRST seperti tabel lain
+    keys = sorted(sketches, key=lambda key: [(value is not None, value if value is not None else 0) for value in key])
+    rows = ((title, month, to_blob(sketches[title, month])) for title, month in keys)
+    conn.executemany("INSERT INTO salary_sketch VALUES (?, ?, ?)", rows)
+
+# Urutan sama dengan ORDER BY ... NULLS FIRST; month tetap integer walau ada NULL
+def _sort_cells(cells, columns):
+    cells = cells.assign(month=cells['month'].astype('Int64'))
+    return cells.sort_values(columns, na_position='first', kind='stable').reset_index(drop=True)
 
-@st.cache_data
-def load_salary_summary(month=None):
-    conn = sqlite3.connect(DB_PATH)
+def salary_result(month=None, db_path=DB_PATH, engine=QUERY_ENGINE):
     if month is None:
         query = """
             SELECT * FROM salary_summary
         """
-        df = pd.read_sql_query(query, conn)
+        df = read_sql(query, db_path=db_path, engine=engine)
     else:
         query = """
             SELECT * FROM salary_summary WHERE month = ?
         """
-        df = pd.read_sql_query(query, conn, params=(month,))
-    conn.close()
+        df = read_sql(query, params=(month,), db_path=db_path, engine=engine)
     return df
+
+def salary_histogram_result(month=None, db_path=DB_PATH, engine=QUERY_ENGINE):
+    if month is None:
+        return read_sql("SELECT * FROM salary_histogram", db_path=db_path, engine=engine)
+    return read_sql("SELECT * FROM salary_histogram WHERE month = ?", params=(month,), db_path=db_path, engine=engine)
+
+def salary_sketch_query(month=None, job_title_short=None):
+    conditions, params = [], []
+    if month is not None:
+        conditions.append("month = ?")
+        params.append(month)
+    if isinstance(job_title_short, (list, tuple)):
+        conditions.append(f"job_title_short IN ({', '.join('?' for _ in job_title_short)})")
+        params.extend(job_title_short)
+    elif job_title_short is not None:
+        conditions.append("job_title_short = ?")
+        params.append(job_title_short)
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT job_title_short, sketch FROM salary_sketch {where_clause}", params
+
+# Percentile salary dari merge sketch: satu baris per job title (by_title),
+# atau satu baris gabungan untuk semua job title terpilih (job_title_short
+# None = semua, string, atau list)
+def salary_quantiles_result(month=None, job_title_short=None, by_title=True, db_path=DB_PATH, engine=QUERY_ENGINE):
+    sql, params = salary_sketch_query(month, job_title_short)
+    cells = read_sql(sql, params=params, db_path=db_path, engine=engine)
+    groups = cells.groupby('job_title_short', dropna=False, sort=True)['sketch'] if by_title else [(None, cells['sketch'])]
+
+    rows = []
+    for title, blobs in groups:
+        sketch = merge(from_blob(blob) for blob in blobs)
+        if count(sketch) == 0:
+            continue
+        values = quantiles(sketch, list(SALARY_QUANTILES.values()))
+        rows.append({'job_title_short': title, 'count': count(sketch), **dict(zip(SALARY_QUANTILES, values))})
+    return pd.DataFrame(rows, columns=['job_title_short', 'count', *SALARY_QUANTILES])
+
+@cached_load()
+def load_salary_summary(month=None, backend=FILTER_BACKEND):
+    if backend == 'materialized':
+        df = lookup_result('salary', month)
+        if df is not None:
+            return df
+    return salary_result(month)
+
+@cached_load(show_spinner=False)
+def load_salary_histogram(month=None, backend=FILTER_BACKEND):
+    if backend == 'materialized':
+        df = lookup_result('salary_histogram', month)
+        if df is not None:
+            return df
+    return salary_histogram_result(month)
+
+@cached_load(show_spinner=False)
+def load_salary_quantiles(month=None, job_title_short=None, by_title=True, backend=FILTER_BACKEND):
+    if backend == 'materialized':
+        df = lookup_result('salary_quantiles', month, job_title_short, by_title)
+        if df is not None:
+            return df
+    return salary_quantiles_result(month, job_title_short, by_title)
@@ -1,68 +1,181 @@
 import sqlite3
+import numpy as np
 import pandas as pd
-import streamlit as st
-
-DB_PATH = 'jobs_skills.db'
-
-@st.cache_data(show_spinner=False)
-def create_top_skills_summary():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Cek tabel
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='job_title_skill_count'")
-    exists = cursor.fetchone()
-
-    if not exists:
-        cursor.execute("""
-            CREATE TABLE job_title_skill_count AS
-            SELECT 
-                j.job_title_short,
-                s.skills,
-                j.job_title,
-                s.type,
-                COUNT(*) AS count
-            FROM skills_job_dim sj
-            JOIN skills_dim s ON sj.skill_id = s.skill_id
-            JOIN job_postings_fact j ON sj.job_id = j.job_id
-            GROUP BY j.job_title_short, s.skills, j.job_title, s.type
-        """)
-        conn.commit()
+
+from bitmap_index import bitmap_index, bitmap_top_skills
+from columnar import create_table_as
+from config import BUILD_ENGINE, DISTINCT_COUNTS, FILTER_BACKEND, QUERY_ENGINE
+from db import DB_PATH, connection, query
+from hll import HLL_M, build_registers, estimate, from_blobs, merge_by_group, to_blob
+from preprocess_dimensions import label_condition
+from result_store import lookup_result
+from result_cache import cached_load
+from summary_registry import register_summary
+
+# Naikkan kalau query create_top_skills_summary berubah (atau encoding dimensi berubah)
+TOP_SKILLS_SUMMARY_VERSION = 4
+TOP_SKILLS_SUMMARY_SCHEMA = {
+    'job_title_skill_count': ['job_title_short_id', 'skill_id', 'job_title_id', 'skill_type_id', 'count'],
+    'job_title_sketch': ['skill_id', 'job_title_short_id', 'skill_type_id', 'registers'],
+}
+TOP_SKILLS_SUMMARY_TABLES = list(TOP_SKILLS_SUMMARY_SCHEMA)
+
+# Jumlah skill yang ditampilkan di chart Top Skills
+TOP_N = 20
+
+SKETCH_CELL_KEYS = ['skill_id', 'job_title_short_id', 'skill_type_id']
+SKETCH_CHUNK_SIZE = 500_000
+
+# Semua kolom teks disimpan sebagai id integer dari tabel dim_* (lihat
+# preprocess_dimensions); skill pakai skill_id dari skills_dim. Label cuma
+# di-decode untuk hasil top-N.
+def top_skills_summary_queries():
+    return [('job_title_skill_count', """
+        SELECT job_title_short_id, skill_id, job_title_id, skill_type_id, COUNT(*) AS count
+        FROM posting_skill_fact
+        GROUP BY 1, 2, 3, 4
+    """, [])]
+
+# Join posting-skill sudah dibuat engine build di posting_skill_fact (lihat
+# preprocess_posting_skill); agregasinya selalu di SQLite
+@register_summary(
+    'top_skills', TOP_SKILLS_SUMMARY_VERSION, TOP_SKILLS_SUMMARY_SCHEMA, sources=['posting_skill_fact'],
+)
+def create_top_skills_summary(db_path=DB_PATH, engine=BUILD_ENGINE):
+    # Selalu dibuat ulang; kapan perlu rebuild diputuskan oleh build_manifest
+    for table, sql, params in top_skills_summary_queries():
+        create_table_as(db_path, table, sql, params, engine='sqlite')
+
+    conn = sqlite3.connect(db_path)
+    create_job_title_sketches(conn)
     conn.close()
 
-@st.cache_data
-def load_top_skills_summary(job_title_short=None, skill_type=None, top_n=20):
+# Satu sketch HyperLogLog job_title_id per sel (skill, job_title_short, skill type).
+# Sketch bisa di-merge, jadi filter gabungan apa pun cukup max() register.
+def create_job_title_sketches(conn):
+    conn.execute("DROP TABLE IF EXISTS job_title_sketch")
+    conn.execute("""
+        CREATE TABLE job_title_sketch (
+            skill_id INTEGER,
+            job_title_short_id INTEGER,
+            skill_type_id INTEGER,
+            registers BLOB NOT NULL
+        )
+    """)
+
+    keys = ", ".join(SKETCH_CELL_KEYS)
+    cells = pd.read_sql_query(f"SELECT DISTINCT {keys} FROM job_title_skill_count", conn)
+    cells['cell'] = np.arange(len(cells))
+    registers = np.zeros((len(cells), HLL_M), dtype=np.uint8)
+
+    chunks = pd.read_sql_query(
+        f"SELECT {keys}, job_title_id FROM job_title_skill_count WHERE job_title_id IS NOT NULL",
+        conn, chunksize=SKETCH_CHUNK_SIZE,
+    )
+    for chunk in chunks:
+        chunk = chunk.merge(cells, on=SKETCH_CELL_KEYS, how='left')
+        build_registers(chunk['cell'].to_numpy(), chunk['job_title_id'].to_numpy(), len(cells), out=registers)
+
+    rows = (
+        tuple(None if pd.isna(key) else int(key) for key in cell[:-1]) + (to_blob(registers[cell[-1]]),)
+        for cell in cells.itertuples(index=False)
+    )
+    conn.executemany("INSERT INTO job_title_sketch VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+
+def top_skills_filter(job_title_short=None, skill_type=None):
     conditions = []
     params = []
 
     if job_title_short:
-        conditions.append("job_title_short = ?")
-        params.append(job_title_short)
+        sql, values = label_condition('dim_job_title_short', job_title_short)
+        conditions.append(sql)
+        params.extend(values)
     if skill_type:
-        conditions.append("type = ?")
-        params.append(skill_type)
+        sql, values = label_condition('dim_skill_type', skill_type)
+        conditions.append(sql)
+        params.extend(values)
 
     where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where_clause, params
+
+def top_skills_queries(job_title_short=None, skill_type=None, top_n=TOP_N):
+    where_clause, params = top_skills_filter(job_title_short, skill_type)
 
     query_total_jobs = f"""
-        SELECT COUNT(DISTINCT job_title) as total_jobs
+        SELECT COUNT(DISTINCT job_title_id) as total_jobs
         FROM job_title_skill_count
         {where_clause}
     """
 
+    # Hitung di id integer, nama skill di-join hanya untuk top-N
     query_top_skills = f"""
-        SELECT skills, COUNT(DISTINCT job_title) as job_count
-        FROM job_title_skill_count
-        {where_clause}
-        GROUP BY skills
-        HAVING skills IS NOT NULL
-        ORDER BY job_count DESC
-        LIMIT {top_n}
+        SELECT s.skills, t.job_count
+        FROM (
+            SELECT skill_id, COUNT(DISTINCT job_title_id) as job_count
+            FROM job_title_skill_count
+            {where_clause}
+            GROUP BY skill_id
+            HAVING skill_id IS NOT NULL
+            ORDER BY job_count DESC, skill_id
+            LIMIT {top_n}
+        ) t
+        JOIN skills_dim s ON s.skill_id = t.skill_id
+        ORDER BY t.job_count DESC, t.skill_id
     """
+    return query_total_jobs, query_top_skills, params
 
-    with sqlite3.connect(DB_PATH) as conn:
-        total_jobs = pd.read_sql_query(query_total_jobs, conn, params=params).iloc[0]['total_jobs']
-        top_skills_df = pd.read_sql_query(query_top_skills, conn, params=params)
+def top_skills_sketch_query(job_title_short=None, skill_type=None):
+    where_clause, params = top_skills_filter(job_title_short, skill_type)
+    sql = f"""
+        SELECT skill_id, registers
+        FROM job_title_sketch
+        {where_clause}
+        ORDER BY skill_id, job_title_short_id, skill_type_id
+    """
+    return sql, params
+
+def top_skill_counts_exact(conn, job_title_short=None, skill_type=None, top_n=TOP_N):
+    query_total_jobs, query_top_skills, params = top_skills_queries(job_title_short, skill_type, top_n)
+    total_jobs = query(conn, query_total_jobs, params).iloc[0]['total_jobs']
+    top_skills_df = query(conn, query_top_skills, params)
+    return total_jobs, top_skills_df
+
+# Estimasi dari sketch: total = merge semua sel, per skill = merge sel per skill_id.
+# top_n=None -> semua skill (dipakai laporan error).
+def top_skill_counts_sketch(conn, job_title_short=None, skill_type=None, top_n=TOP_N):
+    sql, params = top_skills_sketch_query(job_title_short, skill_type)
+    cells = query(conn, sql, params)
+    if cells.empty:
+        return 0, pd.DataFrame(columns=['skills', 'job_count'])
+
+    registers = from_blobs(cells['registers'])
+    total_jobs = float(estimate(registers.max(axis=0))[0])
+
+    known = cells['skill_id'].notna().to_numpy()
+    skill_ids, merged = merge_by_group(registers[known], cells.loc[known, 'skill_id'].astype(int).to_numpy())
+    counts = pd.DataFrame({'skill_id': skill_ids, 'job_count': estimate(merged)})
+    counts = counts.sort_values('job_count', ascending=False, kind='stable')
+    if top_n is not None:
+        counts = counts.head(top_n)
+
+    placeholders = ", ".join("?" for _ in counts['skill_id'])
+    labels = query(
+        conn, f"SELECT skill_id, skills FROM skills_dim WHERE skill_id IN ({placeholders})",
+        [int(skill_id) for skill_id in counts['skill_id']],
+    )
+    top_skills_df = counts.merge(labels, on='skill_id')[['skills', 'job_count']]
+    return total_jobs, top_skills_df
+
+def top_skills_result(job_title_short=None, skill_type=None, top_n=TOP_N, distinct_counts=DISTINCT_COUNTS,
+                      backend=FILTER_BACKEND, db_path=DB_PATH, engine=QUERY_ENGINE):
+    # job_title_short / skill_type boleh string atau list (multi-select)
+    if backend == 'bitmap':
+        total_jobs, top_skills_df = bitmap_top_skills(bitmap_index(db_path), job_title_short, skill_type, top_n)
+    else:
+        count_top_skills = top_skill_counts_sketch if distinct_counts == 'sketch' else top_skill_counts_exact
+        with connection(db_path, engine) as conn:
+            total_jobs, top_skills_df = count_top_skills(conn, job_title_short, skill_type, top_n)
 
     # Hitung persentase dan filter nilai kecil
     top_skills_df['percent'] = (top_skills_df['job_count'] / total_jobs * 100).round(2)
@@ -76,22 +189,43 @@ def load_top_skills_summary(job_title_short=None, skill_type=None, top_n=20):
 
     return result_df
 
-
-
-# Ensure indexes exist (run this once during initialization)
-@st.cache_data
-def initialize_database():
-    conn = sqlite3.connect(DB_PATH)
+# backend 'materialized': hasil yang sudah dihitung saat build (exact); kombinasi
+# yang tidak ada di sana (mis. multi-select) dihitung lewat 'sql'
+@cached_load()
+def load_top_skills_summary(job_title_short=None, skill_type=None, top_n=TOP_N,
+                            distinct_counts=DISTINCT_COUNTS, backend=FILTER_BACKEND):
+    if backend == 'materialized':
+        result_df = lookup_result('top_skills', job_title_short, skill_type, top_n)
+        if result_df is not None:
+            return result_df
+        backend = 'sql'
+    return top_skills_result(job_title_short, skill_type, top_n, distinct_counts, backend)
+
+# Bandingkan sketch vs exact untuk semua kombinasi filter dashboard
+# (title x skill type, termasuk "semua"): total dan tiap skill di top-N exact
+def sketch_error_report(db_path=DB_PATH, top_n=TOP_N):
+    conn = sqlite3.connect(db_path)
     try:
-        conn.execute("""
-        CREATE INDEX IF NOT EXISTS idx_job_title_short 
-        ON job_title_skill_count(job_title_short)
-        """)
-        conn.execute("""
-        CREATE INDEX IF NOT EXISTS idx_type 
-        ON job_title_skill_count(type)
-        """)
-        conn.commit()
+        titles = [None] + [row[0] for row in conn.execute("SELECT job_title_short FROM dim_job_title_short")]
+        types = [None] + [row[0] for row in conn.execute("SELECT skill_type FROM dim_skill_type")]
+        rows = []
+        for title in titles:
+            for skill_type in types:
+                exact_total, exact_top = top_skill_counts_exact(conn, title, skill_type, top_n)
+                sketch_total, sketch_all = top_skill_counts_sketch(conn, title, skill_type, top_n=None)
+                compared = exact_top.merge(sketch_all, on='skills', how='left', suffixes=('_exact', '_sketch'))
+                compared = pd.concat([
+                    pd.DataFrame({'skills': ['<total>'], 'job_count_exact': [exact_total],
+                                  'job_count_sketch': [sketch_total]}),
+                    compared,
+                ])
+                compared.insert(0, 'skill_type', skill_type)
+                compared.insert(0, 'job_title_short', title)
+                rows.append(compared)
     finally:
         conn.close()
 
+    report = pd.concat(rows, ignore_index=True)
+    exact = report['job_count_exact'].astype(float)
+    report['rel_error'] = ((report['job_count_sketch'].fillna(0) - exact).abs() / exact.where(exact > 0)).round(4)
+    return report
@@ -0,0 +1,174 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+import pandas as pd
+
+from config import RESULT_CACHE_MAX_MB, RESULT_CACHE_PATH, RESULT_CACHE_TTL
+from db import build_version
+from result_store import decode_frame, encode_frame
+from tracing import span, traced_cache_data
+
+# Cache hasil load_* di file SQLite, dipakai bersama semua proses Streamlit di
+# host yang sama (replica, restart). Urutan lookup: st.cache_data (memori
+# proses) -> file ini -> query. Payload = DataFrame sebagai Arrow IPC.
+# WAL + busy timeout: banyak pembaca sekaligus, penulis antre lewat
+# BEGIN IMMEDIATE. Error SQLite (mis. lock timeout) dianggap miss, dashboard
+# tetap jalan tanpa cache disk.
+CACHE_TABLE = 'result_cache'
+BUSY_TIMEOUT = 5.0
+# accessed_at (untuk LRU) hanya ditulis ulang kalau sudah lebih tua dari ini,
+# supaya tidak tiap hit jadi write
+TOUCH_INTERVAL = 60
+
+CACHE_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {CACHE_TABLE} (
+        key TEXT PRIMARY KEY,
+        func TEXT NOT NULL,
+        build_version TEXT NOT NULL,
+        payload BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    )
+"""
+
+_local = threading.local()  # satu koneksi per (thread, path)
+
+
+def _connection(path):
+    conns = getattr(_local, 'conns', None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        # auto_vacuum harus diset sebelum tabel pertama dibuat
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(CACHE_SCHEMA)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {CACHE_TABLE}_accessed ON {CACHE_TABLE} (accessed_at)")
+        conns[path] = conn
+    return conn
+
+
+def cache_key(name, params, version):
+    raw = json.dumps([name, params, version], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get(key, path=RESULT_CACHE_PATH, ttl=RESULT_CACHE_TTL):
+    conn = _connection(path)
+    row = conn.execute(
+        f"SELECT payload, created_at, accessed_at FROM {CACHE_TABLE} WHERE key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        return None
+    payload, created_at, accessed_at = row
+    now = time.time()
+    if now - created_at > ttl:
+        conn.execute(f"DELETE FROM {CACHE_TABLE} WHERE key = ?", (key,))
+        return None
+    if now - accessed_at > TOUCH_INTERVAL:
+        conn.execute(f"UPDATE {CACHE_TABLE} SET accessed_at = ? WHERE key = ?", (now, key))
+    return decode_frame(payload)
+
+
+# Buang entri kadaluarsa, lalu yang paling lama tidak dipakai sampai total
+# payload <= max_bytes. Dijalankan di dalam transaksi put.
+def _evict(conn, now, ttl, max_bytes):
+    evicted = conn.execute(f"DELETE FROM {CACHE_TABLE} WHERE created_at < ?", (now - ttl,)).rowcount
+    total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {CACHE_TABLE}").fetchone()[0]
+    if total <= max_bytes:
+        return evicted
+    victims = []
+    for key, size in conn.execute(f"SELECT key, size FROM {CACHE_TABLE} ORDER BY accessed_at"):
+        if total <= max_bytes:
+            break
+        victims.append((key,))
+        total -= size
+    conn.executemany(f"DELETE FROM {CACHE_TABLE} WHERE key = ?", victims)
+    return evicted + len(victims)
+
+
+def put(key, name, version, df, path=RESULT_CACHE_PATH, ttl=RESULT_CACHE_TTL, max_mb=RESULT_CACHE_MAX_MB):
+    payload = encode_frame(df, preserve_index=None)
+    max_bytes = int(max_mb * 2 ** 20)
+    if len(payload) > max_bytes:
+        return
+    conn = _connection(path)
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            f"INSERT OR REPLACE INTO {CACHE_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, name, version, payload, len(payload), now, now),
+        )
+        evicted = _evict(conn, now, ttl, max_bytes)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if evicted:
+        conn.execute("PRAGMA incremental_vacuum")
+
+
+def stats(path=RESULT_CACHE_PATH):
+    if not path or not os.path.exists(path):
+        return {'entries': 0, 'bytes': 0}
+    entries, size = _connection(path).execute(
+        f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {CACHE_TABLE}"
+    ).fetchone()
+    return {'entries': entries, 'bytes': size}
+
+
+def clear(path=RESULT_CACHE_PATH):
+    if path and os.path.exists(path):
+        _connection(path).execute(f"DELETE FROM {CACHE_TABLE}")
+
+
+# Pengganti @traced_cache_data('load', ...) untuk semua load_*: key cache
+# memori ikut build_version, dan kalau RESULT_CACHE_PATH diset hasil
+# DataFrame juga dibaca / ditulis ke cache disk. Argumen dinormalisasi lewat
+# signature (default ikut key), jadi load_x(a) dan load_x(a, b=default) sama.
+def cached_load(**cache_kwargs):
+    def decorate(func):
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def disk(*args, **kwargs):
+            if not RESULT_CACHE_PATH:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            version = build_version()
+            key = cache_key(name, bound.arguments, version)
+            with span('cache', 'result_cache', func=func.__name__) as record:
+                try:
+                    result = get(key)
+                except sqlite3.Error as e:
+                    record['attrs']['sqlite_error'] = str(e)
+                    result = None
+                if result is not None:
+                    record['cache'] = 'hit'
+                    return result
+                record['cache'] = 'miss'
+            result = func(*args, **kwargs)
+            if isinstance(result, pd.DataFrame):
+                try:
+                    put(key, name, version, result)
+                except sqlite3.Error:
+                    pass
+            return result
+
+        return traced_cache_data('load', version=build_version, **cache_kwargs)(disk)
+    return decorate
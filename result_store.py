@@ -0,0 +1,49 @@
+import io
+import json
+
+import pyarrow as pa
+
+from config import QUERY_ENGINE
+from db import DB_PATH, read_sql
+
+# Hasil load_* yang sudah dihitung saat build untuk setiap kombinasi filter
+# dashboard (lihat preprocess_filter_results). Satu baris per (view, key);
+# payload = DataFrame hasil sebagai Arrow IPC terkompresi, jadi di runtime
+# ganti filter = satu lookup primary key + decode.
+RESULT_TABLE = 'filter_result'
+IPC_OPTIONS = pa.ipc.IpcWriteOptions(compression='zstd')
+
+
+# Key = parameter loader sebagai JSON. None kalau ada parameter yang tidak
+# dimaterialisasi (multi-select list)
+def result_key(*params):
+    if any(isinstance(param, (list, tuple)) for param in params):
+        return None
+    return json.dumps(list(params))
+
+
+# preserve_index=None: index non-default ikut disimpan (dipakai result_cache)
+def encode_frame(df, preserve_index=False):
+    table = pa.Table.from_pandas(df, preserve_index=preserve_index)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema, options=IPC_OPTIONS) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def decode_frame(payload):
+    return pa.ipc.open_stream(pa.py_buffer(bytes(payload))).read_all().to_pandas()
+
+
+# DataFrame tersimpan, atau None kalau kombinasi filter ini tidak dimaterialisasi
+def lookup_result(view, *params, db_path=DB_PATH, engine=QUERY_ENGINE):
+    key = result_key(*params)
+    if key is None:
+        return None
+    rows = read_sql(
+        f"SELECT payload FROM {RESULT_TABLE} WHERE view = ? AND key = ?",
+        (view, key), db_path=db_path, engine=engine,
+    )
+    if rows.empty:
+        return None
+    return decode_frame(rows['payload'].iloc[0])
@@ -0,0 +1,98 @@
+from build_manifest import table_name
+from load_data import files
+
+# Semua summary yang dibuild build_db.py. Tiap modul preprocess_* mendaftarkan
+# fungsi create_*-nya lewat @register_summary: nama, versi kode, skema tabel
+# output ({tabel: [kolom]}) dan tabel yang dibaca. Urutan build (DAG) diturunkan
+# dari source: summary yang membaca output summary lain dibuild setelahnya.
+# Satu tabel hanya boleh ditulis satu summary; bentrok ditolak saat daftar.
+SUMMARY_REGISTRY = {}   # {nama: summary}, urut pendaftaran
+_table_owners = {}      # {tabel output: nama summary}
+
+
+def source_tables():
+    return [table_name(filename) for filename in files]
+
+
+def register_summary(name, version, schema, sources):
+    def decorate(build):
+        existing = SUMMARY_REGISTRY.get(name)
+        # Modul yang sama di-import ulang (mis. reload Streamlit): ganti saja
+        if existing is not None and existing['module'] != build.__module__:
+            raise ValueError(f"summary {name!r} sudah didaftarkan oleh {existing['module']}")
+        for table in schema:
+            owner = _table_owners.get(table)
+            if owner is not None and owner != name:
+                raise ValueError(f"tabel {table!r} dari summary {name!r} sudah ditulis oleh summary {owner!r}")
+            if table in source_tables():
+                raise ValueError(f"tabel {table!r} dari summary {name!r} adalah tabel source")
+        if existing is not None:
+            for table in existing['tables']:
+                _table_owners.pop(table, None)
+
+        SUMMARY_REGISTRY[name] = {
+            'name': name,
+            'build': build,
+            'module': build.__module__,
+            'version': version,
+            'schema': {table: list(columns) for table, columns in schema.items()},
+            'tables': list(schema),
+            'sources': list(sources),
+        }
+        for table in schema:
+            _table_owners[table] = name
+        return build
+    return decorate
+
+
+# Summary lain yang output-nya dibaca summary ini
+def dependencies(name):
+    summary = SUMMARY_REGISTRY[name]
+    deps = set()
+    for table in summary['sources']:
+        owner = _table_owners.get(table)
+        if owner is None and table not in source_tables():
+            raise ValueError(f"summary {name!r} membaca tabel {table!r} yang tidak dibuat siapa pun")
+        if owner is not None and owner != name:
+            deps.add(owner)
+    return deps
+
+
+# Urutan topologis, seri mengikuti urutan pendaftaran
+def build_order():
+    order = []
+    visiting = set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"dependensi summary melingkar di {name!r}")
+        visiting.add(name)
+        for dep in sorted(dependencies(name), key=list(SUMMARY_REGISTRY).index):
+            visit(dep)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in SUMMARY_REGISTRY:
+        visit(name)
+    return order
+
+
+# names + semua summary yang (langsung / tidak langsung) membaca output-nya
+def with_dependents(names):
+    names = set(names)
+    for name in build_order():
+        if dependencies(name) & names:
+            names.add(name)
+    return names
+
+
+# Kolom tabel output yang beda dari skema yang didaftarkan
+def schema_problems(conn, name, schema='main'):
+    problems = []
+    for table, columns in SUMMARY_REGISTRY[name]['schema'].items():
+        actual = [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info("{table}")')]
+        if actual != columns:
+            problems.append(f"{table}: kolom {actual}, skema {columns}")
+    return problems
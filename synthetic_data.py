@@ -0,0 +1,176 @@
+import argparse
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Data sintetis dengan skema yang sama dengan ketiga parquet asli, untuk
+# benchmark di berbagai skala (10k - 10M posting). Proporsi dan skew kira-kira
+# mengikuti dataset 2023: ~4.6 skill per posting, job_title sangat long-tail,
+# sebagian kecil posting punya gaji, negara didominasi United States.
+
+JOB_TITLE_SHORT = {
+    'Data Analyst': 196, 'Data Engineer': 186, 'Data Scientist': 172,
+    'Business Analyst': 49, 'Software Engineer': 44, 'Senior Data Engineer': 44,
+    'Senior Data Scientist': 36, 'Senior Data Analyst': 29,
+    'Machine Learning Engineer': 14, 'Cloud Engineer': 12,
+}
+SCHEDULE_TYPES = {
+    'Full-time': 700, 'Contractor': 40, 'Part-time': 15, 'Internship': 8, 'Temp work': 3,
+    'Full-time and Part-time': 3, 'Full-time and Temp work': 2, 'Contractor and Temp work': 2,
+    'Full-time and Contractor': 2, 'Part-time and Internship': 1, None: 15,
+}
+COUNTRIES = {
+    'United States': 206, 'India': 51, 'United Kingdom': 40, 'France': 39, 'Germany': 27,
+    'Spain': 25, 'Singapore': 23, 'Sudan': 21, 'Netherlands': 20, 'Italy': 17, 'Canada': 15,
+    'Indonesia': 9, 'Remote': 5, None: 1,
+}
+SKILL_TYPES = {
+    'programming': 40, 'databases': 30, 'cloud': 30, 'libraries': 55, 'webframeworks': 25,
+    'analyst_tools': 30, 'other': 25, 'os': 10, 'sync': 8, 'async': 6,
+}
+VIA = ['via LinkedIn', 'via Indeed', 'via BeBee', 'via Trabajo.org', 'via ZipRecruiter', 'via Glassdoor']
+DEGREE_FREE_RATE = 0.28
+HEALTH_INSURANCE_RATE = 0.12
+REMOTE_RATE = 0.09
+YEAR_SALARY_RATE = 0.028
+HOUR_SALARY_RATE = 0.0014
+TITLE_VARIANTS_PER_POSTING = 0.3
+SKILLS_PER_POSTING = 4.6
+NO_SKILL_RATE = 0.15
+COMPANIES_PER_POSTING = 0.18
+GENERATE_CHUNK_SIZE = 500_000
+
+JOB_POSTINGS_SCHEMA = pa.schema([
+    ('job_id', pa.int64()),
+    ('company_id', pa.int64()),
+    ('job_title_short', pa.large_string()),
+    ('job_title', pa.large_string()),
+    ('job_location', pa.large_string()),
+    ('job_via', pa.large_string()),
+    ('job_schedule_type', pa.large_string()),
+    ('job_work_from_home', pa.bool_()),
+    ('search_location', pa.large_string()),
+    ('job_posted_date', pa.timestamp('us')),
+    ('job_no_degree_mention', pa.bool_()),
+    ('job_health_insurance', pa.bool_()),
+    ('job_country', pa.large_string()),
+    ('salary_rate', pa.large_string()),
+    ('salary_year_avg', pa.float64()),
+    ('salary_hour_avg', pa.float64()),
+])
+SKILLS_DIM_SCHEMA = pa.schema([
+    ('skill_id', pa.int64()),
+    ('skills', pa.large_string()),
+    ('type', pa.large_string()),
+])
+SKILLS_JOB_SCHEMA = pa.schema([
+    ('job_id', pa.int64()),
+    ('skill_id', pa.int64()),
+])
+
+
+def _choice(rng, weights, size):
+    labels = list(weights)
+    p = np.array(list(weights.values()), dtype=np.float64)
+    return np.array(labels, dtype=object)[rng.choice(len(labels), size, p=p / p.sum())]
+
+
+def _zipf_weights(n, exponent):
+    return 1.0 / np.arange(1, n + 1) ** exponent
+
+
+def skills_dim():
+    skill_ids, names, types = [], [], []
+    for skill_type, count in SKILL_TYPES.items():
+        for i in range(count):
+            skill_ids.append(len(skill_ids))
+            names.append(f"{skill_type}_{i}")
+            types.append(skill_type)
+    return pa.table({'skill_id': skill_ids, 'skills': names, 'type': types}, schema=SKILLS_DIM_SCHEMA)
+
+
+def job_postings_chunk(rng, start, size, n_postings):
+    short = _choice(rng, JOB_TITLE_SHORT, size)
+    # Variasi job_title per job_title_short: sedikit yang sangat sering, sisanya long tail
+    variants = max(int(n_postings * TITLE_VARIANTS_PER_POSTING / len(JOB_TITLE_SHORT)), 1)
+    variant = np.minimum(rng.zipf(1.1, size), variants)
+    title = np.char.add(np.char.add(short.astype(str), ' #'), variant.astype(str)).astype(object)
+
+    country = _choice(rng, COUNTRIES, size)
+    location = np.where(rng.random(size) < REMOTE_RATE, 'Anywhere', country).astype(object)
+
+    seconds = rng.integers(0, 366 * 24 * 3600, size)
+    posted = np.datetime64('2023-01-01T00:00:00', 'us') + seconds.astype('timedelta64[s]')
+
+    yearly = rng.random(size) < YEAR_SALARY_RATE
+    hourly = ~yearly & (rng.random(size) < HOUR_SALARY_RATE)
+    salary_rate = np.where(yearly, 'year', np.where(hourly, 'hour', None)).astype(object)
+
+    columns = {
+        'job_id': np.arange(start, start + size, dtype=np.int64),
+        'company_id': rng.zipf(1.2, size) % max(int(n_postings * COMPANIES_PER_POSTING), 1),
+        'job_title_short': short,
+        'job_title': title,
+        'job_location': location,
+        'job_via': np.array(VIA, dtype=object)[rng.integers(0, len(VIA), size)],
+        'job_schedule_type': _choice(rng, SCHEDULE_TYPES, size),
+        'job_work_from_home': location == 'Anywhere',
+        'search_location': country,
+        'job_posted_date': posted,
+        'job_no_degree_mention': rng.random(size) < DEGREE_FREE_RATE,
+        'job_health_insurance': rng.random(size) < HEALTH_INSURANCE_RATE,
+        'job_country': country,
+        'salary_rate': salary_rate,
+        'salary_year_avg': np.where(yearly, rng.lognormal(11.6, 0.35, size).round(0), np.nan),
+        'salary_hour_avg': np.where(hourly, rng.lognormal(3.8, 0.4, size).round(2), np.nan),
+    }
+    return pa.table(columns, schema=JOB_POSTINGS_SCHEMA)
+
+
+def skills_job_chunk(rng, start, size, n_skills):
+    counts = np.where(rng.random(size) < NO_SKILL_RATE, 0, rng.poisson(SKILLS_PER_POSTING / (1 - NO_SKILL_RATE), size))
+    job_ids = np.repeat(np.arange(start, start + size, dtype=np.int64), counts)
+    popularity = _zipf_weights(n_skills, 1.1)
+    skill_ids = rng.choice(n_skills, len(job_ids), p=popularity / popularity.sum())
+    # Satu skill paling banyak sekali per posting
+    pairs = np.unique(np.stack([job_ids, skill_ids], axis=1), axis=0)
+    return pa.table({'job_id': pairs[:, 0], 'skill_id': pairs[:, 1]}, schema=SKILLS_JOB_SCHEMA)
+
+
+# Tulis job_postings_fact.parquet, skills_dim.parquet dan skills_job_dim.parquet
+# ke directory. Dibuat per chunk, jadi memori tidak tergantung jumlah posting.
+def generate(directory, n_postings, seed=0, chunk_size=GENERATE_CHUNK_SIZE):
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    skills = skills_dim()
+    pq.write_table(skills, os.path.join(directory, 'skills_dim.parquet'))
+
+    rows = {'job_postings_fact': 0, 'skills_dim': skills.num_rows, 'skills_job_dim': 0}
+    with pq.ParquetWriter(os.path.join(directory, 'job_postings_fact.parquet'), JOB_POSTINGS_SCHEMA) as postings, \
+            pq.ParquetWriter(os.path.join(directory, 'skills_job_dim.parquet'), SKILLS_JOB_SCHEMA) as pairs:
+        for start in range(0, n_postings, chunk_size):
+            size = min(chunk_size, n_postings - start)
+            postings.write_table(job_postings_chunk(rng, start, size, n_postings))
+            chunk = skills_job_chunk(rng, start, size, skills.num_rows)
+            pairs.write_table(chunk)
+            rows['job_postings_fact'] += size
+            rows['skills_job_dim'] += chunk.num_rows
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic job postings parquet files.")
+    parser.add_argument('--postings', type=int, default=100_000, help="number of postings (default: %(default)s)")
+    parser.add_argument('--out', default='.', help="output directory (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rows = generate(args.out, args.postings, args.seed)
+    print(", ".join(f"{table}: {count:,} rows" for table, count in rows.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+import contextvars
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from config import METRICS_PATH, METRICS_PORT, TRACE_BUFFER_SIZE, TRACE_PATH, TRACE_SIDEBAR
+
+# Tracing ringan: tiap span = satu langkah (download, create_*, load_*, query SQL,
+# render page, st.plotly_chart) dengan durasi, status cache (hit / miss) dan
+# atribut bebas. Span terakhir disimpan di memori (ring buffer), total per
+# (kind, name, cache) dijumlahkan untuk format Prometheus.
+METRIC_PREFIX = 'jobs_dashboard_span'
+
+_lock = threading.Lock()
+_spans = deque(maxlen=TRACE_BUFFER_SIZE)
+_totals = {}     # {(kind, name, cache): {'count', 'seconds', 'errors'}}
+_ids = itertools.count(1)
+_current = contextvars.ContextVar('tracing_span', default=None)
+_server = None
+_collectors = []  # fungsi tanpa argumen -> baris Prometheus tambahan
+_endpoints = {}   # {path: fungsi tanpa argumen -> (status HTTP, content type, body)}
+
+
+def _finish(record):
+    with _lock:
+        _spans.append(record)
+        total = _totals.setdefault((record['kind'], record['name'], record['cache'] or ''),
+                                   {'count': 0, 'seconds': 0.0, 'errors': 0})
+        total['count'] += 1
+        total['seconds'] += record['ms'] / 1000
+        total['errors'] += record['error'] is not None
+        if TRACE_PATH:
+            with open(TRACE_PATH, 'a') as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+
+@contextmanager
+def span(kind, name, **attrs):
+    parent = _current.get()
+    record = {
+        'id': next(_ids),
+        'parent': parent['id'] if parent else None,
+        'kind': kind,
+        'name': name,
+        'started_at': time.time(),
+        'ms': None,
+        'cache': None,
+        'error': None,
+        'attrs': attrs,
+    }
+    token = _current.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        # Termasuk st.stop() / rerun Streamlit, yang juga lewat exception
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['ms'] = round((time.perf_counter() - started) * 1000, 3)
+        _current.reset(token)
+        _finish(record)
+
+
+def result_rows(result):
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, tuple):
+        return next((len(item) for item in result if isinstance(item, pd.DataFrame)), None)
+    return None
+
+
+def _traced_cache(kind, cache, cache_kwargs, version=None, dump=None, load=None):
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        # data_version hanya ikut key cache, tidak diteruskan ke func
+        @wraps(func)
+        def run(data_version, *args, **kwargs):
+            record = _current.get()
+            if record is not None and record['name'] == func.__name__:
+                record['cache'] = 'miss'
+            result = func(*args, **kwargs)
+            return dump(result) if dump else result
+
+        cached = cache(**cache_kwargs)(run)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            params = dict(signature.bind(*args, **kwargs).arguments)
+            with span(kind, func.__name__, params=params) as record:
+                record['cache'] = 'hit'
+                result = cached(version() if version else None, *args, **kwargs)
+                if load:
+                    result = load(result)
+                record['attrs']['rows'] = result_rows(result)
+                return result
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorate
+
+
+# Pengganti @st.cache_data yang mencatat satu span per panggilan: cache 'hit'
+# kecuali fungsi aslinya benar-benar jalan. .clear() dan __wrapped__ (fungsi
+# asli, tanpa cache) tetap ada. version: fungsi tanpa argumen yang hasilnya
+# ikut key cache (mis. db.build_version), jadi hasil lama tidak dipakai lagi
+# setelah DB dibuild ulang.
+def traced_cache_data(kind, version=None, **cache_kwargs):
+    return _traced_cache(kind, st.cache_data, cache_kwargs, version)
+
+
+def _figure_json(fig):
+    return None if fig is None else fig.to_json()
+
+
+def _figure(spec):
+    return None if spec is None else go.Figure(json.loads(spec))
+
+
+# Figure Plotly lewat @st.cache_resource, tapi yang di-cache JSON-nya (string,
+# immutable), bukan objek figure yang dipakai bersama; tiap pemanggil
+# dapat go.Figure baru. update_layout / update_traces di satu session tidak
+# mengubah figure session lain. Fungsi yang dihias boleh mengembalikan None.
+def traced_cache_figure(**cache_kwargs):
+    return _traced_cache('figure', st.cache_resource, cache_kwargs, dump=_figure_json, load=_figure)
+
+
+# Span tanpa cache, mis. untuk fungsi render page yang berisi widget
+def traced(kind):
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(kind, func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def plotly_chart(fig, **kwargs):
+    with span('chart', 'st.plotly_chart', traces=len(fig.data), title=fig.layout.title.text):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def spans(limit=None):
+    with _lock:
+        records = list(_spans)
+    return records if limit is None else records[-limit:]
+
+
+def clear():
+    with _lock:
+        _spans.clear()
+        _totals.clear()
+
+
+def to_jsonl(records=None):
+    records = spans() if records is None else records
+    return "".join(json.dumps(record, default=str) + "\n" for record in records)
+
+
+def export_jsonl(path):
+    with open(path, 'w') as f:
+        f.write(to_jsonl())
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    with _lock:
+        totals = sorted(_totals.items())
+    lines = [
+        f"# HELP {METRIC_PREFIX}_seconds Time spent in traced spans.",
+        f"# TYPE {METRIC_PREFIX}_seconds summary",
+    ]
+    for (kind, name, cache), total in totals:
+        labels = f'kind="{_label(kind)}",name="{_label(name)}",cache="{_label(cache)}"'
+        lines.append(f"{METRIC_PREFIX}_seconds_count{{{labels}}} {total['count']}")
+        lines.append(f"{METRIC_PREFIX}_seconds_sum{{{labels}}} {total['seconds']:.6f}")
+    lines += [
+        f"# HELP {METRIC_PREFIX}_errors_total Traced spans that raised.",
+        f"# TYPE {METRIC_PREFIX}_errors_total counter",
+    ]
+    for (kind, name, cache), total in totals:
+        labels = f'kind="{_label(kind)}",name="{_label(name)}",cache="{_label(cache)}"'
+        lines.append(f"{METRIC_PREFIX}_errors_total{{{labels}}} {total['errors']}")
+    for collector in list(_collectors):
+        lines += collector()
+    return "\n".join(lines) + "\n"
+
+
+# Modul lain (mis. warmup) bisa menambah metric dan endpoint HTTP sendiri
+def add_collector(collector):
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def add_endpoint(path, handler):
+    _endpoints[path] = handler
+
+
+def write_metrics(path=METRICS_PATH):
+    # Ditulis atomik supaya scraper (mis. textfile collector) tidak membaca file setengah jadi
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/metrics':
+            status, content_type, body = 200, 'text/plain; version=0.0.4', prometheus_text()
+        elif path in _endpoints:
+            status, content_type, body = _endpoints[path]()
+        else:
+            self.send_error(404)
+            return
+        body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Endpoint /metrics (dan endpoint tambahan) di thread sendiri, sekali per proses
+def serve_metrics(port=METRICS_PORT):
+    global _server
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(('', int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+# Sidebar developer (JOBS_TRACE_SIDEBAR=1): span terakhir, total per span,
+# dan download JSON lines / Prometheus
+def render_sidebar(limit=200):
+    if not TRACE_SIDEBAR:
+        return
+    records = spans(limit)
+    with st.sidebar.expander("🔍 Traces", expanded=False):
+        if not records:
+            st.caption("Belum ada span.")
+            return
+        recent = pd.DataFrame([{
+            'kind': r['kind'], 'name': r['name'], 'cache': r['cache'], 'ms': r['ms'],
+            'rows': r['attrs'].get('rows'), 'error': r['error'],
+            'detail': json.dumps(r['attrs'].get('params') or r['attrs'].get('sql') or '', default=str),
+        } for r in reversed(records)])
+        st.dataframe(recent, hide_index=True, use_container_width=True)
+        totals = recent.groupby(['kind', 'name', 'cache'], dropna=False)['ms'].agg(['count', 'mean', 'max'])
+        st.dataframe(totals.round(2).reset_index(), hide_index=True, use_container_width=True)
+        st.download_button("traces.jsonl", to_jsonl(records), file_name='traces.jsonl')
+        st.download_button("metrics.prom", prometheus_text(), file_name='metrics.prom')
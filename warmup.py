@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import WARMUP, WARMUP_CPU_SECONDS, WARMUP_SECONDS, WARMUP_STATUS_PATH, WARMUP_WORKERS
+from db import db_generation
+from pages import introduction, location, salary, top_skills
+from preprocess_dimensions import load_filter_options
+from preprocess_introduction import load_job_summary_stats
+from preprocess_salary import load_salary_summary
+from tracing import add_collector, add_endpoint, span
+
+# Warmer cache di background: memanggil fungsi figure / loader yang sama
+# dengan yang dipanggil page (argumen sama persis), jadi cache st.cache_data
+# dan st.cache_resource sudah terisi sebelum visitor memilih filter itu.
+# Urutan: semua view default ('default'), lalu satu filter per view diurut
+# popularitas ('single'), lalu pasangan filter ('pair'). Budget wall / CPU
+# hanya memotong 'single' dan 'pair'; view default selalu dijalankan.
+# 'ready' = semua langkah default berhasil, atau warmer sudah berhenti (done /
+# budget_exhausted / failed) supaya /ready tidak 503 selamanya; seberapa jauh
+# warm-nya ada di 'defaults_warmed' dan 'coverage'.
+PHASES = ['default', 'single', 'pair']
+
+_lock = threading.Lock()
+_started = False
+_status = {
+    'state': 'idle',          # idle | running | done | budget_exhausted | failed
+    'ready': False,
+    'defaults_warmed': False,
+    'started_at': None,
+    'finished_at': None,
+    'seconds': 0.0,
+    'cpu_seconds': 0.0,
+    'data_version': None,
+    'phases': {phase: {'total': 0, 'done': 0, 'failed': 0} for phase in PHASES},
+    'last_step': None,
+}
+
+
+def _rank(options, counts):
+    return sorted(options, key=lambda value: -counts.get(value, 0))
+
+
+# (phase, fungsi, argumen) dalam urutan prioritas
+def warmup_plan(data_version):
+    default = [
+        (load_job_summary_stats, ()),
+        (introduction.top_jobs_figure, (data_version,)),
+        (introduction.skill_type_figure, (data_version,)),
+        (introduction.job_locations_figure, (data_version,)),
+        (salary.salary_bar_figure, (None, data_version)),
+        (salary.salary_histogram_figure, (None, data_version)),
+        (salary.salary_box_figure, (None, data_version)),
+        (salary.job_title_pie_figure, (None, data_version)),
+        (top_skills.top_skills_figure, (None, None, data_version)),
+        (top_skills.demand_skills_figure, (None, None, data_version)),
+        *((location.job_map_data, (zoom, data_version)) for zoom in location.RESOLUTIONS.values()),
+    ]
+    plan = [('default', func, args) for func, args in default]
+
+    # Job title diurut jumlah posting (yang punya salary); skill type dan
+    # schedule ikut urutan tampilan di page; bulan kronologis
+    title_counts = load_salary_summary().groupby('job_title_short')['count'].sum().to_dict()
+    titles = _rank(load_filter_options('dim_job_title_short'), title_counts)
+    skill_types = top_skills.preferred_order(load_filter_options('dim_skill_type'), top_skills.SKILL_TYPE_ORDER)
+    schedules = top_skills.preferred_order(load_filter_options('dim_schedule_type'), top_skills.SCHEDULE_TYPE_ORDER)
+    months = list(salary.MONTH_NUM)
+
+    # Satu filter: nilai ke-i dari tiap filter digilir, jadi yang paling
+    # populer di semua view selesai duluan
+    single = []
+    for i in range(max(len(titles), len(skill_types), len(schedules), len(months))):
+        if i < len(titles):
+            single.append((i, top_skills.top_skills_figure, (titles[i], None, data_version)))
+            single.append((i, top_skills.demand_skills_figure, (titles[i], None, data_version)))
+        if i < len(skill_types):
+            single.append((i, top_skills.top_skills_figure, (None, skill_types[i], data_version)))
+        if i < len(schedules):
+            single.append((i, top_skills.demand_skills_figure, (None, schedules[i], data_version)))
+        if i < len(months):
+            for func in (salary.salary_bar_figure, salary.salary_histogram_figure, salary.salary_box_figure,
+                         salary.job_title_pie_figure):
+                single.append((i, func, (months[i], data_version)))
+    plan += [('single', func, args) for _, func, args in single]
+
+    # Pasangan filter, diurut jumlah rank kedua nilainya
+    pairs = [(i + j, top_skills.top_skills_figure, (title, skill_type, data_version))
+             for i, title in enumerate(titles) for j, skill_type in enumerate(skill_types)]
+    pairs += [(i + j, top_skills.demand_skills_figure, (title, schedule, data_version))
+              for i, title in enumerate(titles) for j, schedule in enumerate(schedules)]
+    pairs.sort(key=lambda pair: pair[0])
+    plan += [('pair', func, args) for _, func, args in pairs]
+    return plan
+
+
+def _step_name(func, args):
+    # data_version (argumen terakhir figure) tidak informatif
+    shown = [arg for arg in args if not isinstance(arg, tuple)]
+    return f"{func.__name__}({', '.join(repr(arg) for arg in shown)})"
+
+
+def status():
+    with _lock:
+        snapshot = json.loads(json.dumps(_status))
+    total = sum(phase['total'] for phase in snapshot['phases'].values())
+    done = sum(phase['done'] for phase in snapshot['phases'].values())
+    snapshot['coverage'] = round(done / total, 4) if total else 0.0
+    return snapshot
+
+
+def write_status(path=WARMUP_STATUS_PATH):
+    # Ditulis atomik, sama seperti write_metrics
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(status(), f, indent=2)
+    os.replace(tmp, path)
+
+
+def _update(**changes):
+    with _lock:
+        _status.update(changes)
+    write_status()
+
+
+def run_warmup(workers=WARMUP_WORKERS, max_seconds=WARMUP_SECONDS, max_cpu_seconds=WARMUP_CPU_SECONDS):
+    started = time.perf_counter()
+    _update(state='running', started_at=time.time(), data_version=list(db_generation()))
+
+    try:
+        with span('warmup', 'warmup_plan'):
+            plan = warmup_plan(db_generation())
+    except Exception:
+        _update(state='failed', ready=True, finished_at=time.time())
+        raise
+    with _lock:
+        for phase, _, _ in plan:
+            _status['phases'][phase]['total'] += 1
+        _status['defaults_warmed'] = _status['ready'] = _status['phases']['default']['total'] == 0
+
+    steps = iter(plan)
+    exhausted = threading.Event()
+
+    def over_budget():
+        with _lock:
+            cpu = _status['cpu_seconds']
+        return time.perf_counter() - started > max_seconds or cpu > max_cpu_seconds
+
+    # Tiap worker mengambil langkah berikutnya dari plan yang sama, jadi urutan
+    # prioritas terjaga; budget dicek sebelum tiap langkah di luar 'default'
+    def worker():
+        while not exhausted.is_set():
+            with _lock:
+                step = next(steps, None)
+            if step is None:
+                return
+            phase, func, args = step
+            if phase != 'default' and over_budget():
+                exhausted.set()
+                return
+            cpu_started = time.thread_time()
+            failed = False
+            try:
+                with span('warmup', func.__name__, phase=phase):
+                    func(*args)
+            except Exception:
+                failed = True
+            with _lock:
+                counts = _status['phases'][phase]
+                counts['failed' if failed else 'done'] += 1
+                _status['cpu_seconds'] = round(_status['cpu_seconds'] + time.thread_time() - cpu_started, 3)
+                _status['seconds'] = round(time.perf_counter() - started, 3)
+                _status['last_step'] = _step_name(func, args)
+                # Hanya langkah yang berhasil dihitung sebagai sudah di-warm
+                default = _status['phases']['default']
+                _status['defaults_warmed'] = default['done'] == default['total']
+                _status['ready'] = _status['ready'] or _status['defaults_warmed']
+            write_status()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='warmup') as pool:
+        for _ in range(max(1, workers)):
+            pool.submit(worker)
+
+    _update(
+        state='budget_exhausted' if exhausted.is_set() else 'done',
+        ready=True,
+        finished_at=time.time(),
+        seconds=round(time.perf_counter() - started, 3),
+    )
+
+
+# Dipanggil dari app.py tiap rerun; warmer hanya dimulai sekali per proses
+def start_warmup(enabled=WARMUP):
+    global _started
+    if not enabled:
+        return False
+    with _lock:
+        if _started:
+            return False
+        _started = True
+    threading.Thread(target=run_warmup, name='warmup', daemon=True).start()
+    return True
+
+
+def prometheus_lines():
+    snapshot = status()
+    if snapshot['state'] == 'idle':
+        return []
+    prefix = 'jobs_dashboard_warmup'
+    lines = [
+        f"# HELP {prefix}_ready 1 when every default view has been warmed or the warmer has stopped.",
+        f"# TYPE {prefix}_ready gauge",
+        f"{prefix}_ready {int(snapshot['ready'])}",
+        f"# HELP {prefix}_defaults_warmed 1 when every default view was warmed successfully.",
+        f"# TYPE {prefix}_defaults_warmed gauge",
+        f"{prefix}_defaults_warmed {int(snapshot['defaults_warmed'])}",
+        f"# HELP {prefix}_coverage Fraction of planned warmup steps completed.",
+        f"# TYPE {prefix}_coverage gauge",
+        f"{prefix}_coverage {snapshot['coverage']}",
+        f"# HELP {prefix}_seconds Wall / CPU time spent by the warmer.",
+        f"# TYPE {prefix}_seconds gauge",
+        f'{prefix}_seconds{{clock="wall"}} {snapshot["seconds"]}',
+        f'{prefix}_seconds{{clock="cpu"}} {snapshot["cpu_seconds"]}',
+        f"# HELP {prefix}_steps Warmup steps per phase and status.",
+        f"# TYPE {prefix}_steps gauge",
+    ]
+    for phase, counts in snapshot['phases'].items():
+        for key, value in counts.items():
+            lines.append(f'{prefix}_steps{{phase="{phase}",status="{key}"}} {value}')
+    return lines
+
+
+# GET /ready di server metrics (JOBS_METRICS_PORT): 200 kalau warmer mati, view
+# default sudah di-warm, atau warmer sudah berhenti; 503 selama masih jalan
+def ready_endpoint():
+    snapshot = status()
+    ready = not WARMUP or snapshot['ready']
+    return (200 if ready else 503), 'application/json', json.dumps(snapshot)
+
+
+add_collector(prometheus_lines)
+add_endpoint('/ready', ready_endpoint)